@@ -0,0 +1,188 @@
+"""Moves finished auctions out of the live tables.
+
+Auctions that closed more than ``after_days`` ago are copied, with their
+bids, embed, attributes, search entry and journal events, into a separate
+archive database and deleted from the live one. Every connection the
+repository opens has it attached as ``archive``. ``auctioned_pokemon`` rows
+past the re-auction window are dropped, and the pages freed by both are
+given back with an incremental vacuum. The live tables, and everything that
+scans them, only ever hold open and recently closed auctions.
+"""
+import asyncio
+import os
+import time
+
+# A Pokémon can't be auctioned again this soon after its last auction ended
+AUCTIONED_POKEMON_TTL = 7 * 86400
+
+# Tables moved to the archive, keyed by auction_id, in the order they are
+# copied. The schema mirrors the live tables, minus AUTOINCREMENT: ids are
+# kept, and the live tables never hand them out again.
+ARCHIVED_TABLES = ("auctions", "bids", "pokemon_embeds", "pokemon_attributes",
+                   "auction_events")
+
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.auctions (
+        auction_id INTEGER PRIMARY KEY,
+        channel_id TEXT,
+        message_id TEXT,
+        item_embed_url TEXT,
+        buyout_price INTEGER,
+        end_time INTEGER,
+        auctioneer_id TEXT,
+        min_bid INTEGER,
+        interval INTEGER,
+        current_bid INTEGER DEFAULT 0,
+        winner_id TEXT,
+        pokemon_name TEXT,
+        closed_at INTEGER,
+        leader_id TEXT,
+        bid_count INTEGER NOT NULL DEFAULT 0,
+        last_bid_at INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.bids (
+        bid_id INTEGER PRIMARY KEY,
+        auction_id INTEGER,
+        user_id TEXT,
+        bid_amount INTEGER,
+        timestamp INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_bids_auction "
+    "ON bids(auction_id)",
+    """
+    CREATE TABLE IF NOT EXISTS archive.pokemon_embeds (
+        auction_id INTEGER PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        fields TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.pokemon_attributes (
+        auction_id INTEGER PRIMARY KEY,
+        species TEXT NOT NULL,
+        nickname TEXT,
+        gender TEXT,
+        level INTEGER,
+        variant TEXT NOT NULL,
+        iv_percent REAL NOT NULL,
+        hidden_power TEXT,
+        held_item TEXT,
+        hp_base INTEGER, hp_iv INTEGER, hp_ev INTEGER,
+        atk_base INTEGER, atk_iv INTEGER, atk_ev INTEGER,
+        def_base INTEGER, def_iv INTEGER, def_ev INTEGER,
+        spatk_base INTEGER, spatk_iv INTEGER, spatk_ev INTEGER,
+        spdef_base INTEGER, spdef_iv INTEGER, spdef_ev INTEGER,
+        spd_base INTEGER, spd_iv INTEGER, spd_ev INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.auction_events (
+        event_id INTEGER PRIMARY KEY,
+        auction_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        user_id TEXT,
+        amount INTEGER,
+        data TEXT,
+        created_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_auction_events_auction "
+    "ON auction_events(auction_id, event_id)",
+    # Copied straight from the live pokemon_search, rowid is the auction id
+    "CREATE VIRTUAL TABLE IF NOT EXISTS archive.pokemon_search "
+    "USING fts5(title, body)",
+]
+
+
+def archive_path(path):
+    """The archive file kept next to the database at ``path``."""
+    root, ext = os.path.splitext(path)
+    return f"{root}_archive{ext or '.db'}"
+
+
+def create_archive(conn, path, journal_mode="WAL"):
+    """Create the archive database at ``path`` if it's missing."""
+    conn.execute("ATTACH DATABASE ? AS archive", (path, ))
+    try:
+        conn.execute(f"PRAGMA archive.journal_mode = {journal_mode}")
+        for statement in ARCHIVE_SCHEMA:
+            conn.execute(statement)
+        # Archives made before a migration added columns to a live table
+        for table in ARCHIVED_TABLES:
+            archived = {
+                row[1]
+                for row in conn.execute(f"PRAGMA archive.table_info({table})")
+            }
+            for row in conn.execute(
+                    f"PRAGMA main.table_info({table})").fetchall():
+                if row[1] not in archived:
+                    default = "" if row[4] is None else f" DEFAULT {row[4]}"
+                    conn.execute(f"ALTER TABLE archive.{table} "
+                                 f"ADD COLUMN {row[1]} {row[2]}{default}")
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+
+class Archiver:
+    """Archives old auctions every ``interval`` seconds in the background.
+
+    Each batch of ``batch`` auctions is its own write, so bids and closes
+    queue behind one batch at most rather than the whole backlog.
+    """
+
+    def __init__(self, repo, after_days=30, interval=3600, batch=100):
+        self.repo = repo
+        self.after_days = after_days
+        self.interval = interval
+        self.batch = batch
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def run_once(self, now=None):
+        """One pass; returns ``(archived, expired, freed_pages)``."""
+        now = int(time.time()) if now is None else now
+        # Every archived event must be in a snapshot already, or a restart
+        # could start from one that still has the auction open and never
+        # see it close
+        await self.repo.snapshot_journal()
+        archived = 0
+        while True:
+            moved = await self.repo.archive_closed(
+                now - self.after_days * 86400, self.batch)
+            archived += moved
+            if moved < self.batch:
+                break
+        expired = await self.repo.expire_auctioned_pokemon(
+            now - AUCTIONED_POKEMON_TTL)
+        freed = await self.repo.incremental_vacuum()
+        return archived, expired, freed
+
+    async def _run(self):
+        while True:
+            try:
+                archived, expired, freed = await self.run_once()
+                if archived or expired:
+                    print(f"Archived {archived} auctions, expired {expired} "
+                          f"auctioned Pokémon, freed {freed} pages")
+            except Exception as e:
+                print(f"Failed to archive closed auctions: {e}")
+            await asyncio.sleep(self.interval)
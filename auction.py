@@ -1,41 +1,145 @@
 import discord
 from typing import Literal
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import Embed, app_commands, Interaction, ButtonStyle
 # from discord import app_commands
 from discord.ui import View, Button
-import sqlite3
-from datetime import datetime, timedelta
-import pytz
 import re
 import json
 from PIL import Image
 from io import BytesIO
 import requests
-from collections import Counter
-
-
-def get_dominant_color_from_url(image_url):
-    try:
-        response = requests.get(image_url)
-        img = Image.open(BytesIO(response.content)).convert("RGBA")
-        img = img.resize((100, 100))  # Resize for faster processing
-
-        # Filter out mostly transparent pixels
-        pixels = [
-            (r, g, b) for r, g, b, a in img.getdata()
-            if a > 50  # keep only opaque/semi-opaque pixels
-        ]
-
-        if not pixels:
-            raise ValueError("All pixels are transparent.")
-
-        most_common = Counter(pixels).most_common(1)[0][0]
-        return discord.Color.from_rgb(*most_common)
+import asyncio
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from archive import AUCTIONED_POKEMON_TTL, Archiver
+from channels import ChannelPool, GuildChannelResolver
+from database import EDITABLE_COLUMNS, AuctionRepository, fts_query
+from embeds import EmbedUpdater
+from journal import JournalSnapshots
+from metrics import METRICS, MetricsExporter, instrument_http
+from notifications import OutbidNotifier
+from permissions import PermissionCache
+from pokemon_parser import parse_pokemon_embed
+from prices import IV_BAND, iv_band
+from scheduler import AuctionScheduler
+from state import AuctionCache, AuctionState, BidRejected
+
+
+# Color quantization knobs: levels per RGB channel, thumbnail size and the
+# alpha value a pixel must exceed to be counted
+COLOR_BUCKETS = 16
+COLOR_RESIZE = (64, 64)
+COLOR_ALPHA_CUTOFF = 50
+
+
+def dominant_rgb(img,
+                 buckets=COLOR_BUCKETS,
+                 size=COLOR_RESIZE,
+                 alpha_cutoff=COLOR_ALPHA_CUTOFF):
+    """Return the (r, g, b) average of the most populated color bucket."""
+    img = img.convert("RGBA").resize(size)
+    pixels = np.asarray(img, dtype=np.uint8).reshape(-1, 4)
+
+    # Filter out mostly transparent pixels
+    opaque = pixels[pixels[:, 3] > alpha_cutoff, :3]
+    if not len(opaque):
+        raise ValueError("All pixels are transparent.")
+
+    # Map every channel to 0..buckets-1 and fold the three into one key
+    levels = (opaque.astype(np.uint32) * buckets) >> 8
+    keys = (levels[:, 0] * buckets + levels[:, 1]) * buckets + levels[:, 2]
+    mode = np.bincount(keys, minlength=buckets**3).argmax()
+
+    r, g, b = opaque[keys == mode].mean(axis=0).round().astype(int)
+    return int(r), int(g), int(b)
+
+
+def _extract_dominant_color(image_url):
+    response = requests.get(image_url, timeout=10)
+    response.raise_for_status()
+    img = Image.open(BytesIO(response.content))
+    return discord.Color.from_rgb(*dominant_rgb(img))
+
+
+class DominantColorCache:
+    """Resolves embed colors off the event loop.
+
+    Downloads and decoding run on a small thread pool, results are kept in an
+    LRU keyed by image URL and concurrent lookups of the same URL share one
+    in-flight fetch.
+    """
+
+    def __init__(self, max_size=512, max_workers=4):
+        self.max_size = max_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="color")
+        self._cache = OrderedDict()
+        self._inflight = {}
+
+    async def get(self, image_url):
+        color = self._cache.get(image_url)
+        if color is not None:
+            self._cache.move_to_end(image_url)
+            return color
+
+        task = self._inflight.get(image_url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(image_url))
+            self._inflight[image_url] = task
+
+        # Shield so one cancelled waiter doesn't cancel the shared fetch
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            print(f"Image color detection failed: {e}")
+            return discord.Color.blurple()
 
-    except Exception as e:
-        print(f"Image color detection failed: {e}")
-        return discord.Color.blurple()
+    async def _fetch(self, image_url):
+        loop = asyncio.get_running_loop()
+        try:
+            color = await loop.run_in_executor(self._executor,
+                                               _extract_dominant_color,
+                                               image_url)
+        finally:
+            self._inflight.pop(image_url, None)
+
+        # Only successful lookups are cached, failures are retried next time
+        self._cache[image_url] = color
+        self._cache.move_to_end(image_url)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return color
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Channel name prefix, display emoji and variant table per parsed variant
+VARIANT_PREFIXES = {
+    "shiny": "⭐|",
+    "radiant": "🎆|",
+    "gleam": "🔮|",
+    "alpha": "🌌|",
+    "shadow": "🌑|",
+}
+
+VARIANT_EMOJIS = {
+    "shiny": "🌟",
+    "radiant": "<:archaic_stone:1385907327424663672>",
+    "gleam": "🔮",
+    "alpha": "<:alpha:1385906481752309911>",
+    "shadow": "<:shadow:1385906473028292608>",
+}
+
+VARIANT_TABLES = {
+    "radiant": "radiants",
+    "gleam": "gleams",
+    "alpha": "alphas",
+}
 
 
 def list_choices():
@@ -45,7 +149,7 @@ def list_choices():
     ]
 
 
-def poke_data(cursor, db, auction_id, embed, desc):
+async def poke_data(repo, auction_id, embed, desc):
     title = embed.title
     description = desc  # embed.description or ""
     fields_data = []
@@ -57,24 +161,23 @@ def poke_data(cursor, db, auction_id, embed, desc):
             "inline": field.inline
         })
 
-    cursor.execute(
-        "INSERT INTO pokemon_embeds (auction_id, title, description, fields) VALUES (?, ?, ?, ?)",
-        (auction_id, title, description, json.dumps(fields_data)))
-    db.commit()
+    await repo.save_pokemon_embed(auction_id, title, description,
+                                  json.dumps(fields_data))
 
 
-def get_pokemon_data(cursor, auction_id: int):
-    cursor.execute(
-        "SELECT title, description, fields FROM pokemon_embeds WHERE auction_id = ?",
-        (auction_id, ))
-    data = cursor.fetchone()
+async def get_pokemon_data(repo, auction_id: int):
+    data = await repo.get_pokemon_embed(auction_id)
     if not data:
         return None
 
     title, description, fields_json = data
-    fields = json.loads(fields_json)
+    return build_pokemon_embed(title, description, fields_json)
+
 
+def build_pokemon_embed(title, description, fields_json):
     embed = discord.Embed(title=title, description=description)
+    # Most auctions store no fields, skip decoding an empty list
+    fields = json.loads(fields_json) if fields_json not in (None, "[]") else []
     for field in fields:
         embed.add_field(name=field["name"],
                         value=field["value"],
@@ -84,16 +187,46 @@ def get_pokemon_data(cursor, auction_id: int):
 
 class AuctionBot(commands.Cog):
 
+    # Closed auctions announced at once, and attempts per auction with a
+    # linearly growing delay (seconds) between them
+    CLOSE_CONCURRENCY = 5
+    CLOSE_ATTEMPTS = 3
+    CLOSE_RETRY_DELAY = 2
+
     def __init__(self, bot):
         self.bot = bot
-        self.db = sqlite3.connect('auction_bot.db', check_same_thread=False)
-        self.cursor = self.db.cursor()
-        self.timezone = pytz.timezone('Asia/Kolkata')
+        # Share the bot-wide repository when AucMain created one
+        self.repo = getattr(bot, "repo", None) or AuctionRepository()
+        self.colors = DominantColorCache()
+        self.auctions = AuctionCache()
+        self.scheduler = AuctionScheduler(self._on_auctions_due)
+        self.embeds = EmbedUpdater(bot)
+        self.notifier = OutbidNotifier(bot, self.repo)
+        self.permissions = PermissionCache(self.repo)
+        self.channels = GuildChannelResolver(self.repo)
+        self.pool = ChannelPool(bot, self.repo, self.channels)
+        self.snapshots = JournalSnapshots(self.repo)
+        self.archiver = Archiver(self.repo)
+        self.exporter = MetricsExporter.from_env()
+        instrument_http(bot)
+
+    async def cog_load(self):
+        await self.permissions.load()
+        await self.channels.load()
+        await self.pool.load()
+
+    async def cog_before_invoke(self, ctx):
+        ctx.perf_start = time.perf_counter()
+
+    async def cog_after_invoke(self, ctx):
+        # Runs after failed invocations too, so errors are timed as well
+        start = getattr(ctx, "perf_start", None)
+        if start is not None:
+            METRICS.observe("command_seconds", ctx.command.qualified_name,
+                            time.perf_counter() - start)
 
     def is_auctioneer(self, user_id):
-        self.cursor.execute("SELECT 1 FROM auctioneers WHERE user_id = ?",
-                            (str(user_id), ))
-        return self.cursor.fetchone() is not None
+        return self.permissions.is_auctioneer(user_id)
 
     @commands.hybrid_command(name='auctioneer')
     async def toggle_auctioneer(self, ctx, user_id: int):
@@ -102,17 +235,44 @@ class AuctionBot(commands.Cog):
             await ctx.send("Only the server owner can manage auctioneers.")
             return
 
-        self.cursor.execute("SELECT 1 FROM auctioneers WHERE user_id = ?",
-                            (str(user_id), ))
-        if self.cursor.fetchone():
-            self.cursor.execute("DELETE FROM auctioneers WHERE user_id = ?",
-                                (str(user_id), ))
+        added = await self.repo.toggle_auctioneer(user_id)
+        await self.permissions.invalidate()
+        if added:
+            await ctx.send(f"User {user_id} is now an auctioneer.")
+        else:
             await ctx.send(f"User {user_id} is no longer an auctioneer.")
+
+    @commands.hybrid_command(
+        name='auctionguild',
+        description="Allow or disallow a server from using the auction bot.")
+    @commands.is_owner()
+    async def toggle_guild(self, ctx, guild_id: str = None):
+        """Toggle whether a guild may use auction commands (bot owner only)."""
+        guild_id = int(guild_id) if guild_id else ctx.guild.id
+        added = await self.repo.toggle_allowed_guild(guild_id)
+        await self.permissions.invalidate()
+        if added:
+            await ctx.send(f"✅ Server {guild_id} can now use auctions.")
         else:
-            self.cursor.execute("INSERT INTO auctioneers (user_id) VALUES (?)",
-                                (str(user_id), ))
-            await ctx.send(f"User {user_id} is now an auctioneer.")
-        self.db.commit()
+            await ctx.send(f"🚫 Server {guild_id} can no longer use auctions.")
+
+    @commands.hybrid_command(
+        name='auctionpool',
+        description="Keep spare auction channels for reuse (0 turns it off).")
+    @commands.has_guild_permissions(manage_guild=True)
+    async def set_channel_pool(self, ctx, size: int):
+        """Set how many parked auction channels this server keeps."""
+        if not 0 <= size <= ChannelPool.MAX_SIZE:
+            return await ctx.send(
+                f"❌ Pool size must be between 0 and {ChannelPool.MAX_SIZE}.")
+        await self.pool.set_size(ctx.guild, size)
+        if size:
+            await ctx.send(
+                f"✅ Finished auction channels are now reused, keeping {size} spare."
+            )
+        else:
+            await ctx.send(
+                "🗑️ Auction channels are now deleted when auctions end.")
 
     @commands.hybrid_command(name='auction')
     @commands.cooldown(1, 10, commands.BucketType.user)
@@ -160,259 +320,83 @@ class AuctionBot(commands.Cog):
             await ctx.send("❌ No embed found in the message.")
             return
 
-        # Step 1: Extract Global ID from footer
-        footer_text = original_embed.footer.text if original_embed.footer else ""
-        global_id_match = re.search(r"Global ID#:\s*(\d+)", footer_text)
+        pokemon = parse_pokemon_embed(original_embed)
 
-        if not global_id_match:
+        # Step 1: Global ID from footer
+        if not pokemon.global_id:
             await ctx.send(
                 "❌ Could not find the Pokémon's Global ID in the embed footer."
             )
             return
 
-        global_id = global_id_match.group(1)
+        global_id = pokemon.global_id
 
-        self.cursor.execute(
-            """
-            SELECT last_auction_end FROM auctioned_pokemon
-            WHERE global_id = ?
-        """, (global_id, ))
-        row = self.cursor.fetchone()
+        last_auction_end = await self.repo.get_last_auction_end(global_id)
 
-        if row:
-            last_auction_end = datetime.fromisoformat(row[0])
-            if datetime.now(self.timezone) - last_auction_end < timedelta(
-                    days=7):
-                await ctx.send(
-                    "❌ This Pokémon was already auctioned in the last 7 days.")
-                return
+        if (last_auction_end
+                and time.time() - last_auction_end < AUCTIONED_POKEMON_TTL):
+            await ctx.send(
+                "❌ This Pokémon was already auctioned in the last 7 days.")
+            return
 
-        KNOWN_NATURES = [
-            "adamant", "bashful", "bold", "brave", "calm", "careful", "docile",
-            "gentle", "hardy", "hasty", "impish", "jolly", "lax", "lonely",
-            "mild", "modest", "naive", "naughty", "quiet", "quirky", "rash",
-            "relaxed", "sassy", "serious", "timid"
-        ]
-
-        # Combine all content
-        title = original_embed.title or ""
-        # title = title.replace("<:blank:1012504803496177685>", "")
-
-        level_match = re.search(r"<:lvl:\d+>\s*(\d+)", title)
-        level = level_match.group(1) if level_match else "??"
-
-        # Check if shiny
-        shiny = ":star2:" in title
-        gleam = ":gleam:" in title
-        radiant = ":radiant:" in title
-        alpha = ":alphapoke2:" in title
-        shadow = ":shadow:" in title
-
-        if ":genderless:" in title:
-            gender = "Genderless"
-        elif ":male:" in title:
-            gender = "Male"
-        elif ":female:" in title:
-            gender = "Female"
-        else:
-            gender = "Unknown"
-
-        # title = title.replace(":genderless:", "").replace(":male:", "").replace(":female:", "")
-        # title = title.replace("<:lvl:1029030189981765673>", "").replace(level, "").strip()
-
-        # 1. Discord emojis
-        clean_title = re.sub(r"<:\w+:\d+>", "", title)
-
-        # 2. Stand-alone emojis
-        clean_title = re.sub(r":\w+:", "", clean_title)
-
-        # 3. Levels
-        clean_title = re.sub(r"\b\d+\b", "", clean_title)
-
-        clean_title = clean_title.strip().lower()
-        words = clean_title.split()
-        filtered_words = [word for word in words if word not in KNOWN_NATURES]
-        title = " ".join(
-            filtered_words)  # clean_title = " ".join(filtered_words)
-
-        description = original_embed.description or ""
-        field_values = "\n".join(f.value for f in original_embed.fields)
-        text_block = f"{description}\n{field_values}"
-
-        def extract(pattern, default=None, cast=str):
-            match = re.search(pattern, text_block, re.IGNORECASE)
-            return cast(match.group(1)) if match else default
-
-        # Parse info
-
-        # Clean and extract Pokémon name
-        # clean_description = re.sub(r":\w+?:", "", description).strip()
-
-        # Extract nickname if wrapped in single quotes
-        nickname_match = re.search(r"'([^']+)'", title)
-        nickname = nickname_match.group(1).strip() if nickname_match else None
-
-        # Remove emojis and quotes
-        title_wo_emojis = re.sub(r"<a?:\w+:\d+>", "",
-                                 title)  # Custom Discord emojis
-        title_wo_emojis = re.sub(r":[^:\s]+:", "",
-                                 title_wo_emojis)  # Unicode-style emojis
-        title_wo_emojis = re.sub(r"['\"`]", "",
-                                 title_wo_emojis)  # Quotes/backticks
-
-        # Remove level numbers
-        title_wo_emojis = re.sub(r"\b\d+\b", "", title_wo_emojis)
-
-        # Remove known natures from title
-        title_cleaned = title_wo_emojis
-        for nature in KNOWN_NATURES:
-            title_cleaned = re.sub(rf"\b{nature}\b",
-                                   "",
-                                   title_cleaned,
-                                   flags=re.IGNORECASE)
-
-        # Final clean-up
-        words = title_cleaned.strip().split()
-        # Pokémon name is usually the last word
-        if nickname:
-            pokemon_name = title.replace(nickname, "").strip()
-            # pokemon_name = words[-2].lower() if words else "unknown"
-        elif not nickname:
-            pokemon_name = title
-            # pokemon_name = words[-1].lower() if words else "unknown"
-        # Parse IV %
-        iv_match = re.search(r'IV %.*?(\d+\.\d+)%', text_block)
-        iv_percent = iv_match.group(1) if iv_match else "00.00"
+        pokemon_name = pokemon.name
+        nickname = pokemon.nickname
+        gender = pokemon.gender
+        iv_percent = f"{pokemon.iv_percent:.2f}"
 
         # Set prefix and channel name
-        if shiny:
-            star_prefix = "⭐|"
-        elif radiant:
-            star_prefix = "🎆|"
-        elif gleam:
-            star_prefix = "🔮|"
-        elif alpha:
-            star_prefix = "🌌|"
-        elif shadow:
-            star_prefix = "🌑|"
-        else:
-            star_prefix = ""
+        star_prefix = VARIANT_PREFIXES.get(pokemon.variant, "")
+        channel_name = f"{star_prefix}{pokemon_name}-{round(pokemon.iv_percent)}"
 
-        channel_name = f"{star_prefix}{pokemon_name}-{round(float(iv_percent))}"
-
-        # POKEMON_TYPES = [
-        #     "normal", "fire", "water", "electric", "grass", "ice", "fighting",
-        #     "poison", "ground", "flying", "psychic", "bug", "rock", "ghost",
-        #     "dragon", "dark", "steel", "fairy"
-        # ]
-
-        # types_found = re.findall(r":([a-z_]+):", text_block)
-        # types = ", ".join(
-        #     t for t in types_found if t in POKEMON_TYPES) or "Unknown"
-
-        # ability = extract(r"Ability:\s*(.*?)(?:\n|$)", "Unknown")
-        # level = extract(r":lvl:\s*(\d+)", "??")
-        # nature = extract(r"(\+[\w]+/-[\w]+)")
-
-        print("Title:", title)
-        print("Pokemon Name:", pokemon_name.replace("''", "").strip())
+        print("Pokemon Name:", pokemon_name)
         print("Gender:", gender)
-        print("Level:", level)
-
-        # exp = extract(r"EXP:\s*([\d]+/[^\n]+)")
-        # egg = extract(r"Egg Groups:\s*:.*?\s*(.*?)(?:\n|$)", "Unknown")
-
-        raw_hold = extract(
-            r"(?:Holding|Held Item)\s*:\s*(?:<:\w+:\d+>\s*)?(.*?)(?:\n|$)",
-            "None")
-        hold = raw_hold.strip() if raw_hold else "None"
-
-        hpw = extract(r"\*\*Hidden Power\*\*:\s*(?:`)?(.*?)(?:`)?(?:\n|$)",
-                      "Unknown")
-
-        # Parse Stats (simplified)
-        stats = {}
-        for stat in ['HP', 'Attack', 'Defense', 'Sp. Atk', 'Sp. Def', 'Speed']:
-            match = re.search(rf"{stat}:\s*(\d+).*?(\d+)\s*\|\s*(\d+)",
-                              text_block)
-            if match:
-                stats[stat] = {
-                    'value': match.group(1),
-                    'iv': match.group(2),
-                    'ev': match.group(3)
-                }
-
-        # Moves
-        # moves_match = re.search(r"Moves:\s*(.*?)$", text_block, re.DOTALL)
-        # moves = [m.strip() for m in moves_match.group(1).split(",")
-        #          ] if moves_match else []
+        print("Level:", pokemon.level)
 
         # Create channel
-        category = discord.utils.get(ctx.guild.categories, name="Auctions")
-        if not category:
-            category = await ctx.guild.create_category("Auctions")
-
         bot_member = ctx.guild.me
-        auction_channel = await ctx.guild.create_text_channel(
-            channel_name,
-            category=category,
-            topic=
-            f"Auction: {pokemon_name.replace('-', ' ').title()} ({iv_percent}%)",
-            overwrites={
-                ctx.guild.default_role:
-                discord.PermissionOverwrite(send_messages=True,
-                                            view_channel=True,
-                                            read_message_history=True),
-                ctx.author:
-                discord.PermissionOverwrite(send_messages=True,
-                                            view_channel=True,
-                                            read_message_history=True),
-                bot_member:
-                discord.PermissionOverwrite(send_messages=True,
-                                            view_channel=True,
-                                            embed_links=True,
-                                            read_message_history=True)
-            })
+        topic = f"Auction: {pokemon_name.replace('-', ' ').title()} ({iv_percent}%)"
+        overwrites = {
+            ctx.guild.default_role:
+            discord.PermissionOverwrite(send_messages=True,
+                                        view_channel=True,
+                                        read_message_history=True),
+            ctx.author:
+            discord.PermissionOverwrite(send_messages=True,
+                                        view_channel=True,
+                                        read_message_history=True),
+            bot_member:
+            discord.PermissionOverwrite(send_messages=True,
+                                        view_channel=True,
+                                        embed_links=True,
+                                        read_message_history=True)
+        }
+        # A parked channel only needs an edit; otherwise create one
+        auction_channel = await self.pool.acquire(ctx.guild, channel_name,
+                                                  topic, overwrites)
+        if auction_channel is None:
+            category = await self.channels.auction_category(ctx.guild)
+            auction_channel = await ctx.guild.create_text_channel(
+                channel_name,
+                category=category,
+                topic=topic,
+                overwrites=overwrites)
 
         # Insert into DB
         duration *= 60
-        end_time = datetime.now(self.timezone) + timedelta(minutes=duration)
-        unix_time = int(end_time.timestamp())
-        discord_time = f"<t:{unix_time}:f>"
-
-        if shiny:
-            display_name = f"🌟 {gender} {pokemon_name.replace('-', ' ').title()} '{nickname}'"
-            variant = ""
-        elif radiant:
-            display_name = f"<:archaic_stone:1385907327424663672> {gender} {pokemon_name.replace('-', ' ').title()} '{nickname}'"
-            variant = "radiants"
-        elif gleam:
-            display_name = f"🔮 {gender} {pokemon_name.replace('-', ' ').title()} '{nickname}'"
-            variant = "gleams"
-        elif alpha:
-            display_name = f"<:alpha:1385906481752309911> {gender} {pokemon_name.replace('-', ' ').title()} '{nickname}'"
-            variant = "alphas"
-        elif shadow:
-            display_name = f"<:shadow:1385906473028292608> {gender} {pokemon_name.replace('-', ' ').title()} '{nickname}'"
-            variant = ""
-        else:
-            display_name = f"{gender} {pokemon_name.replace('-', ' ').title()} '{nickname}'"
-            variant = ""
+        # Unix seconds; Discord renders <t:...> in each viewer's timezone
+        end_time = int(time.time()) + duration * 60
+        discord_time = f"<t:{end_time}:f>"
+
+        display_name = f"{gender} {pokemon_name.replace('-', ' ').title()} '{nickname}'"
+        if pokemon.variant in VARIANT_EMOJIS:
+            display_name = f"{VARIANT_EMOJIS[pokemon.variant]} {display_name}"
+        variant = VARIANT_TABLES.get(pokemon.variant, "")
 
         print("Variant:", variant)
 
         variant_snippet = ""
         if variant:
-            if variant == "alphas":
-                self.cursor.execute(
-                    f"SELECT release_month, move FROM {variant} WHERE name = ?",
-                    (pokemon_name.replace("''",
-                                          "").strip(), ))  #replace('-', ' ').
-            else:
-                self.cursor.execute(
-                    f"SELECT release_month FROM {variant} WHERE name = ?",
-                    (pokemon_name.replace("''", "").strip(), ))
-            row = self.cursor.fetchone()
+            row = await self.repo.get_variant_info(variant, pokemon_name)
             if row:
                 release_month = row[0]
                 variant_snippet = f"**Released month:** `{release_month}`\n"
@@ -420,41 +404,22 @@ class AuctionBot(commands.Cog):
                     move = row[1]
                     variant_snippet += f"**Move:** `{move}`\n"
 
-        # Insert into auctions table
-        self.cursor.execute(
-            """
-            INSERT INTO auctions (
-                channel_id, message_id, item_embed_url, buyout_price, end_time,
-                auctioneer_id, min_bid, interval, current_bid, winner_id, pokemon_name
-            )
-            VALUES (?, NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (str(auction_channel.id), embed_url,
-             buyout_price if buyout_price is not None else None,
-             end_time.isoformat(), str(
-                 ctx.author.id), min_bid, interval, None, None, display_name))
-
-        self.db.commit()
-
-        # Update auctioned_pokemon table
-        self.cursor.execute(
-            """
-            INSERT OR REPLACE INTO auctioned_pokemon (global_id, last_auction_end)
-            VALUES (?, ?)
-        """, (global_id, end_time.isoformat()))
-        self.db.commit()
-
-        self.cursor.execute("SELECT last_insert_rowid()")
-        auction_id = self.cursor.fetchone()[0]
-
-        desc = f"**Level:** {level or '??'}\n\
-        **Hidden Power:** {hpw or 'Unknown'}\n\
-        **Held Item:** {hold or 'None'}\n\
+        # Insert into auctions table and update auctioned_pokemon
+        auction_id = await self.repo.create_auction(
+            global_id, auction_channel.id, embed_url, buyout_price,
+            end_time, ctx.author.id, min_bid, interval,
+            display_name, pokemon=pokemon)
+
+        level = pokemon.level if pokemon.level is not None else "??"
+        desc = f"**Level:** {level}\n\
+        **Nature:** {pokemon.nature or 'Unknown'}\n\
+        **Hidden Power:** {pokemon.hidden_power or 'Unknown'}\n\
+        **Held Item:** {pokemon.held_item or 'None'}\n\
         {variant_snippet}\
         \n**Stats (Base | IV | EV):**\n" + "\n".join(
-            f"• **{k}:** {v['value']} | {v['iv']} | {v['ev']}"
-            for k, v in stats.items()) + f"\n**IV %:** {iv_percent}%"
-        # | **Nature:** {nature or 'Unknown'} | **Gender:** {gender or 'Unknown'}\n"
+            f"• **{k}:** {base} | {iv} | {ev}"
+            for k, (base, iv, ev) in pokemon.stats.items()) + f"\n**IV %:** {iv_percent}%"
+        # | **Gender:** {gender or 'Unknown'}\n"
         #  f"**Ability:** {ability or 'Unknown'}\n"
         #  f"**EXP:** {exp or 'Unknown'}\n"
         #  f"**Types:** {types or 'Unknown'}\n"
@@ -465,7 +430,7 @@ class AuctionBot(commands.Cog):
         buyout_display = f"🏷️ **Buyout:** {buyout_price:,}" if buyout_price is not None else "🏷️ **Buyout:** *None*"
 
         if original_embed.image and original_embed.image.url:
-            embed_color = get_dominant_color_from_url(original_embed.image.url)
+            embed_color = await self.colors.get(original_embed.image.url)
         else:
             embed_color = discord.Color.blurple()
 
@@ -483,11 +448,19 @@ class AuctionBot(commands.Cog):
         embed.set_footer(text=f"Auction ID: {auction_id}")
 
         auction_message = await auction_channel.send(embed=embed)
-        self.cursor.execute(
-            "UPDATE auctions SET message_id = ? WHERE auction_id = ?",
-            (str(auction_message.id), auction_id))
-        self.db.commit()
-        poke_data(self.cursor, self.db, auction_id, embed, desc)
+        await self.repo.set_message_id(auction_id, auction_message.id)
+        self.embeds.register(auction_id, auction_message, embed)
+        self.auctions.put(
+            AuctionState(auction_id=auction_id,
+                         channel_id=auction_channel.id,
+                         message_id=auction_message.id,
+                         auctioneer_id=ctx.author.id,
+                         min_bid=min_bid,
+                         interval=interval,
+                         buyout_price=buyout_price,
+                         end_time=end_time))
+        self.scheduler.schedule(auction_id, end_time)
+        await poke_data(self.repo, auction_id, embed, desc)
 
         if ctx.interaction:
             await ctx.interaction.followup.send(
@@ -504,6 +477,67 @@ class AuctionBot(commands.Cog):
         else:
             raise error  # Raise other unexpected errors
 
+    async def accept_bid(self, auction_id, user_id, bid_amount):
+        """Validate and commit a bid, one at a time per auction.
+
+        Returns ``(auction, previous_bidder_id, bought_out)``. Raises
+        BidRejected with the message for the bidder when the bid is invalid.
+        """
+        if auction_id not in self.auctions:
+            # Only open auctions are cached, tell closed ones apart
+            if await self.repo.get_auction(auction_id):
+                raise BidRejected("Auction has ended.")
+            raise BidRejected("Auction not found.")
+
+        async with self.auctions.lock(auction_id):
+            auction = self.auctions.get(auction_id)
+            if not auction or time.time() > auction.end_time:
+                raise BidRejected("Auction has ended.")
+
+            if bid_amount < auction.min_bid:
+                raise BidRejected(
+                    f"Bid must be at least the minimum bid: {auction.min_bid} credits"
+                )
+
+            current_bid = auction.current_bid or 0
+            if bid_amount <= current_bid or (bid_amount -
+                                             current_bid) < auction.interval:
+                raise BidRejected(
+                    f"Bid must be higher than the current bid {current_bid} by at least {auction.interval} credits."
+                )
+
+            bought_out = bool(auction.buyout_price
+                              and bid_amount >= auction.buyout_price)
+            if bought_out:
+                accepted = await self.repo.buyout(auction_id, user_id,
+                                                  bid_amount, int(time.time()))
+            else:
+                accepted = await self.repo.record_bid(auction_id, user_id,
+                                                      bid_amount,
+                                                      int(time.time()))
+            # The database only takes a strictly higher bid on an open
+            # auction, whatever the cache thought
+            if not accepted:
+                raise BidRejected("Auction has ended or was outbid.")
+            previous_bidder_id = auction.leader_id
+            auction.current_bid = bid_amount
+            auction.leader_id = user_id
+            if bought_out:
+                self._retire(auction_id)
+
+        return auction, previous_bidder_id, bought_out
+
+    def _retire(self, auction_id):
+        """Stop accepting bids for an auction and drop its deadline."""
+        self.auctions.remove(auction_id)
+        self.scheduler.cancel(auction_id)
+        self.embeds.forget(auction_id)
+
+    async def _retire_locked(self, auction_id):
+        # Waits for an in-flight bid so it is counted before the close
+        async with self.auctions.lock(auction_id):
+            self._retire(auction_id)
+
     @commands.hybrid_command(name='bid')
     async def place_bid(self, ctx: commands.Context, auction_id: int,
                         bid_amount: int):
@@ -511,125 +545,55 @@ class AuctionBot(commands.Cog):
         if ctx.interaction:
             await ctx.interaction.response.defer(thinking=True)
         """Place a bid on an auction."""
-        self.cursor.execute("SELECT * FROM auctions WHERE auction_id = ?",
-                            (auction_id, ))
-        auction = self.cursor.fetchone()
-        if not auction:
-            await ctx.send("Auction not found.")
-            return
-
-        channel_id = int(auction[1])
-        message_id = int(auction[2])
-        if auction[4]:
-            buyout_price = int(auction[4])
-        else:
-            buyout_price = None
-        end_time = datetime.fromisoformat(str(auction[5])).astimezone(
-            self.timezone)
-        min_bid = auction[7]
-        interval = auction[8]
-        current_bid = auction[9]
-        channel = self.bot.get_channel(channel_id)
-
-        if datetime.now(self.timezone) > end_time:
-            await ctx.send("Auction has ended.")
-            return
-
-        if bid_amount < min_bid:
-            await ctx.send(
-                f"Bid must be at least the minimum bid: {min_bid} credits")
-            return
-
-        if not current_bid:
-            current_bid = 0
-
-        if bid_amount <= current_bid or (bid_amount - current_bid) < interval:
-            await ctx.send(
-                f"Bid must be higher than the current bid {current_bid} by at least {interval} credits."
-            )
+        try:
+            auction, previous_bidder_id, bought_out = await self.accept_bid(
+                auction_id, ctx.author.id, bid_amount)
+        except BidRejected as e:
+            await ctx.send(str(e))
             return
 
-        # Get the previous highest bidder
-        self.cursor.execute(
-            '''
-            SELECT user_id FROM bids
-            WHERE auction_id = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        ''', (auction_id, ))
-        row = self.cursor.fetchone()
-        previous_bidder_id = row[0] if row else None
+        # Everything below talks to Discord and runs outside the auction lock
+        channel = self.bot.get_channel(auction.channel_id)
 
         # Check if the previous bidder isn't the one placing the new bid
-        if previous_bidder_id and previous_bidder_id != str(ctx.author.id):
-            self.cursor.execute(
-                "SELECT 1 FROM outbid_notifs WHERE user_id = ?",
-                (previous_bidder_id, ))
-            if self.cursor.fetchone():
-                try:
-                    previous_user = await self.bot.fetch_user(
-                        int(previous_bidder_id))
-                    await previous_user.send(
-                        f"📣 You've been outbid in auction #{auction_id}!")
-                except discord.Forbidden:
-                    print(
-                        f"DM to user {previous_bidder_id} failed — DMs closed or blocked."
-                    )
-                    await channel.send(
-                        f"📣 <@{previous_bidder_id}>, You've been outbid by `{ctx.author.display_name}`"
-                    )
-                except Exception as e:
-                    print(f"Unexpected DM error: {e}")
-
-        now_str = datetime.now(self.timezone).isoformat()
-
-        # Record the bid
-        self.cursor.execute(
-            """
-            INSERT INTO bids (auction_id, user_id, bid_amount, timestamp)
-            VALUES (?, ?, ?, ?)
-        """, (auction_id, str(ctx.author.id), bid_amount, now_str))
-        self.cursor.execute(
-            "UPDATE auctions SET current_bid = ? WHERE auction_id = ?",
-            (bid_amount, auction_id))
-        self.db.commit()
-
-        # Update the embed
-        try:
-            message = await channel.fetch_message(message_id)
-            embed = message.embeds[0]
+        if previous_bidder_id and previous_bidder_id != ctx.author.id:
+            self.notifier.notify(previous_bidder_id, auction_id,
+                                 auction.channel_id, ctx.author.display_name)
+
+        # Update the embed; edits are coalesced and always show the latest bid
+        def show_current_bid(embed):
             desc = embed.description
+            current_bid = auction.current_bid
 
             if "💰 **Min Bid:**" in desc:
                 desc = re.sub(r"💰 \*\*Min Bid:\*\*.*?\n",
-                              f"💸 **Current Bid:** {bid_amount:,}\n", desc)
+                              f"💸 **Current Bid:** {current_bid:,}\n", desc)
             else:
                 desc = re.sub(r"💸 \*\*Current Bid:\*\*.*?\n",
-                              f"💸 **Current Bid:** {bid_amount:,}\n", desc)
+                              f"💸 **Current Bid:** {current_bid:,}\n", desc)
 
             embed.description = desc
-            await message.edit(embed=embed)
 
-        except discord.NotFound:
-            await ctx.send(
-                "⚠️ Could not update auction embed — message not found.")
-        except discord.Forbidden:
-            await ctx.send(
-                "⚠️ Cannot edit auction message — bot lacks permission.")
-        except Exception as e:
-            await ctx.send(f"⚠️ Unexpected error while updating embed: {e}")
+        if not bought_out:
+            try:
+                await self.embeds.update(auction_id, auction.channel_id,
+                                         auction.message_id, show_current_bid)
+            except discord.NotFound:
+                await ctx.send(
+                    "⚠️ Could not update auction embed — message not found.")
+            except discord.Forbidden:
+                await ctx.send(
+                    "⚠️ Cannot edit auction message — bot lacks permission.")
+            except Exception as e:
+                await ctx.send(
+                    f"⚠️ Unexpected error while updating embed: {e}")
 
         await ctx.send(
             f"✅ Bid placed: {bid_amount} credits by `{ctx.author.display_name}`"
         )
 
         # 💥 Buyout logic
-        if buyout_price and bid_amount >= buyout_price:
-            self.cursor.execute(
-                "UPDATE auctions SET winner_id = ? WHERE auction_id = ?",
-                (str(ctx.author.id), auction_id))
-            self.db.commit()
-
+        if bought_out:
             # try:
             #     msg = await channel.fetch_message(message_id)
             #     pokemon_name = msg.embeds[0].title or "Unknown"
@@ -640,18 +604,14 @@ class AuctionBot(commands.Cog):
             await channel.send(
                 f"🏁 Auction ended immediately! <@{ctx.author.id}> bought out the item for {bid_amount:,} credits."
             )
-            logs_channel = discord.utils.get(ctx.guild.channels,
-                                             name="auction-logs")
-            if not logs_channel:
-                logs_channel = await ctx.guild.create_text_channel(
-                    "auction-logs")
+            logs_channel = await self.channels.logs_channel(ctx.guild)
 
-            end_time_dt = datetime.now(self.timezone)
-            unix_time = int(end_time_dt.timestamp())
-            discord_time = f"<t:{unix_time}:f>"
+            discord_time = f"<t:{int(time.time())}:f>"
 
-            embed = get_pokemon_data(self.cursor, auction_id)
-            if embed:
+            embed = await get_pokemon_data(self.repo, auction_id)
+            if not logs_channel:
+                print(f"No auction-logs channel for auction {auction_id}")
+            elif embed:
                 embed.title = f"📦 Auction Closed: {embed.title}"
                 embed.color = discord.Color.green()
                 embed.description = f"{embed.description}\n\n**Auction ID:** {auction_id}\n**Winner:** <@{ctx.author.id}>\n**Final Bid:** {bid_amount:,} credits\n**Ended At:** {discord_time}"
@@ -662,185 +622,162 @@ class AuctionBot(commands.Cog):
                 )
 
             try:
-                await channel.delete(reason="Auction ended by buyout.")
+                await self.pool.release(channel,
+                                        reason="Auction ended by buyout.")
             except Exception as e:
                 print(f"Failed to delete channel {channel.name}: {e}")
 
     @commands.hybrid_command(
         name="list", description="View active auctions or auctioneers.")
     @app_commands.choices(choice=list_choices())
-    async def list_auctions(self, ctx: commands.Context,
-                            choice: app_commands.Choice[str]):
+    async def list_auctions(self,
+                            ctx: commands.Context,
+                            choice: app_commands.Choice[str],
+                            variant: Literal["normal", "shiny", "radiant",
+                                             "gleam", "alpha",
+                                             "shadow"] = None,
+                            min_iv: float = None,
+                            sort: Literal["ending", "price"] = "ending"):
         if choice.value == "auctioneers":
-            self.cursor.execute("SELECT DISTINCT user_id FROM auctioneers")
-            rows = self.cursor.fetchall()
+            auctioneers = sorted(self.permissions.auctioneers)
 
-            if not rows:
+            if not auctioneers:
                 return await ctx.send("⚠️ No auctioneers found.")
 
-            mentions = [f"<@{row[0]}>" for row in rows]
+            mentions = [f"<@{user_id}>" for user_id in auctioneers]
             embed = Embed(title="🧑‍⚖️ Registered Auctioneers",
                           description="\n".join(mentions),
                           color=0xf39c12)
             return await ctx.send(embed=embed)
 
         elif choice.value == "auctions":
-            now = datetime.now(self.timezone).isoformat()
-            self.cursor.execute(
-                "SELECT auction_id, item_embed_url, end_time, current_bid, pokemon_name FROM auctions WHERE end_time > ? AND winner_id IS NULL ORDER BY end_time ASC",
-                (now, ))
-            auctions = self.cursor.fetchall()
-
-            if not auctions:
+            filtered = variant is not None or min_iv is not None
+            # Only the unfiltered count is known without a query
+            view = AuctionListView(ctx,
+                                   self.repo,
+                                   total=None if filtered else len(
+                                       self.auctions),
+                                   sort=sort,
+                                   variant=variant,
+                                   min_iv=min_iv)
+            if not await view.load_page(0):
+                if filtered:
+                    return await ctx.send("No active auctions match.")
                 return await ctx.send("No active auctions at the moment.")
+            await view.send_page()
 
-            fields_per_page = 9
-            pages = []
-
-            for i in range(0, len(auctions), fields_per_page):
-                chunk = auctions[i:i + fields_per_page]
-                lines = [
-                    "ID   | Name       | Ends In       | Current Bid", "-" * 45
-                ]
-
-                for auction in chunk:
-                    auction_id = str(auction[0])
-                    pokemon_name = auction[4]
-                    end_time = datetime.fromisoformat(auction[2])
-                    current_bid = int(auction[3] or 0)
-
-                    time_remaining = end_time - datetime.now(self.timezone)
-                    if time_remaining.total_seconds() < 0:
-                        ends_in = "Ended"
-                    else:
-                        hrs, rem = divmod(int(time_remaining.total_seconds()),
-                                          3600)
-                        mins, _ = divmod(rem, 60)
-                        ends_in = f"{hrs}h {mins}m" if hrs else f"{mins}m"
-
-                    lines.append(
-                        f"{auction_id:<4} | {pokemon_name:<10} | {ends_in:<12} | {current_bid:,}"
-                    )
-
-                embed = Embed(title="📢 Active Auctions", color=0x3498db)
-                embed.description = f"```{chr(10).join(lines)}```"
-                pages.append(embed)
+    async def load_state(self):
+        """Rebuild the auction cache and expiry heap from the journal."""
+        await self.auctions.load(self.repo)
+        for auction in self.auctions:
+            self.scheduler.schedule(auction.auction_id, auction.end_time)
 
-            view = AuctionListView(ctx, pages)
-            await view.send_page()
+    async def _on_auctions_due(self, auction_ids):
+        await self.check_auctions()
 
-    @tasks.loop(seconds=60)
     async def check_auctions(self):
         """Close expired auctions and announce winners."""
-        now = datetime.now(self.timezone).isoformat()
-        self.cursor.execute(
-            "SELECT * FROM auctions WHERE end_time <= ? AND winner_id IS NULL",
-            (now, ))
-        auctions = self.cursor.fetchall()
-
-        for auction in auctions:
-            auction_id = auction[0]
-            channel_id = int(auction[1])
-            channel = self.bot.get_channel(channel_id)
-            if not channel:
-                continue
+        with METRICS.timer("check_auctions_seconds"):
+            await self._close_expired()
 
-            self.cursor.execute(
-                "SELECT user_id, MAX(bid_amount) FROM bids WHERE auction_id = ?",
-                (auction_id, ))
-            result = self.cursor.fetchone()
-            print(f"Checking auction {auction_id}: result = {result}")
+    async def _close_expired(self):
+        now = int(time.time())
+        # Let bids that are already validating finish before the close
+        for auction_id in await self.repo.get_expired_auctions(now):
+            await self._retire_locked(auction_id)
 
-            # Get or create logs channel
-            logs_channel = discord.utils.get(channel.guild.channels,
-                                             name="auction-logs")
-            if not logs_channel:
-                try:
-                    logs_channel = await channel.guild.create_text_channel(
-                        "auction-logs")
-                except Exception as e:
-                    print(f"Failed to create 'auction-logs' channel: {e}")
-                    logs_channel = None  # Just to be safe
-
-            # message_id = auction[2]
-            # try:
-            #     msg = await channel.fetch_message(message_id)
-            #     pokemon_name = msg.embeds[0].title or "Unknown"
+        closed = await self.repo.close_expired(now)
+        if not closed:
+            return
+        print(f"Closed {len(closed)} expired auctions")
 
-            # except (AttributeError, discord.NotFound):
-            #     pokemon_name = "Unknown"
-            # pokemon_url = auction[2]
-            # buyout_price = int(auction[4])
-            end_time = auction[5]
-            end_time_dt = datetime.fromisoformat(end_time)
-            unix_time = int(end_time_dt.timestamp())
-            discord_time = f"<t:{unix_time}:f>"
-
-            # print(f"Checking auction {auction_id}: result = {result}")
-            if result and result[0] and result[1] and int(
-                    result[1]) > 0 and auction[9]:
-                winner_id = int(result[0])
-                final_bid = int(auction[9])
-
-                self.cursor.execute(
-                    "UPDATE auctions SET winner_id = ? WHERE auction_id = ?",
-                    (winner_id, auction_id))
-
-                await channel.send(
-                    f"🏁 Auction ended! Winner: <@{winner_id}> with a bid of {final_bid:,} credits."
-                )
+        semaphore = asyncio.Semaphore(self.CLOSE_CONCURRENCY)
+        await asyncio.gather(*(self._announce_close(auction, semaphore)
+                               for auction in closed))
 
-                if logs_channel:
-                    embed = get_pokemon_data(self.cursor, auction_id)
-                    if embed:
-                        embed.title = f"📦 Auction Closed: {embed.title}"
-                        embed.color = discord.Color.green()
-                        embed.description = f"{embed.description}\n\n**Auction ID:** {auction_id}\n**Winner:** <@{winner_id}>\n**Final Bid:** {final_bid:,} credits\n**Ended At:** {discord_time}"
-                        await logs_channel.send(embed=embed)
-                    else:
-                        await logs_channel.send(
-                            f"⚠️ Could not retrieve embed data for auction ID {auction_id}"
-                        )
+    async def _announce_close(self, auction, semaphore):
+        """Announce a closed auction, log it and delete its channel.
+
+        Each step runs once; a failed step is retried on the next attempt
+        without repeating the ones before it.
+        """
+        auction_id = auction["auction_id"]
+        channel = self.bot.get_channel(int(auction["channel_id"]))
+        if not channel:
+            return
+        discord_time = f"<t:{auction['end_time']}:f>"
+        winner_id = auction["winner_id"]
+        final_bid = auction["final_bid"] or 0
 
+        sold = bool(winner_id and final_bid > 0)
+        if sold:
+            announcement = f"🏁 Auction ended! Winner: <@{winner_id}> with a bid of {final_bid:,} credits."
+        else:
+            announcement = "⚠️ Auction ended with no bids."
+
+        def log_embed():
+            # Only built once there is a log channel to post it to
+            if auction["title"] is None:
+                return None
+            embed = build_pokemon_embed(auction["title"],
+                                        auction["description"],
+                                        auction["fields"])
+            if sold:
+                embed.title = f"📦 Auction Closed: {embed.title}"
+                embed.color = discord.Color.green()
+                embed.description = f"{embed.description}\n\n**Auction ID:** {auction_id}\n**Winner:** <@{winner_id}>\n**Final Bid:** {final_bid:,} credits\n**Ended At:** {discord_time}"
             else:
-                try:
-                    await channel.send("⚠️ Auction ended with no bids.")
-                except Exception as e:
-                    print(
-                        f"Failed to send message in auction channel {channel_id}: {e}"
-                    )
+                embed.title = f"Auction Ended: {embed.title}"
+                embed.color = discord.Color.red()
+                embed.description = f"{embed.description}\n\n**Auction ID:** {auction_id}\n**Final Bid:** --\n**Ended At:** {discord_time}"
+            return embed
 
-                if logs_channel:
-                    embed = get_pokemon_data(self.cursor, auction_id)
-                    if embed:
-                        embed.title = f"Auction Ended: {embed.title}"
-                        embed.color = discord.Color.red()
-                        embed.description = f"{embed.description}\n\n**Auction ID:** {auction_id}\n**Final Bid:** --\n**Ended At:** {discord_time}"
-                        await logs_channel.send(embed=embed)
-                    else:
-                        await logs_channel.send(
-                            f"⚠️ Could not retrieve embed data for auction ID {auction_id}"
-                        )
+        async def log():
+            logs_channel = await self.channels.logs_channel(channel.guild)
+            if not logs_channel:
+                return
+            embed = log_embed()
+            if embed:
+                await logs_channel.send(embed=embed)
+            else:
+                await logs_channel.send(
+                    f"⚠️ Could not retrieve embed data for auction ID {auction_id}"
+                )
 
-            self.db.commit()
+        async def delete():
+            try:
+                await self.pool.release(channel, reason="Auction ended.")
+            except discord.NotFound:
+                pass
 
+        steps = [lambda: channel.send(announcement), log, delete]
+        for attempt in range(1, self.CLOSE_ATTEMPTS + 1):
             try:
-                await channel.delete(reason="Auction ended.")
+                async with semaphore:
+                    while steps:
+                        await steps[0]()
+                        steps.pop(0)
+                return
             except Exception as e:
-                print(f"Failed to delete channel {channel.name}: {e}")
+                print(f"Closing auction {auction_id} failed "
+                      f"(attempt {attempt}/{self.CLOSE_ATTEMPTS}): {e}")
+            if attempt < self.CLOSE_ATTEMPTS:
+                # Back off outside the semaphore so other auctions proceed
+                await asyncio.sleep(self.CLOSE_RETRY_DELAY * attempt)
 
     @commands.hybrid_command(
         name="endearly",
         description="End your auction early (only for the creator).")
     async def end_early(self, ctx, auction_id: int = None):
 
-        self.cursor.execute("SELECT * FROM auctions WHERE auction_id = ?",
-                            (auction_id, ))
-        auction = self.cursor.fetchone()
+        auction = await self.repo.get_auction(auction_id)
 
         if not auction:
             return await ctx.send("❌ No auction found with that ID.")
 
+        if auction["closed_at"] is not None:
+            return await ctx.send("❌ This auction has already ended.")
+
         auctioneer_id = str(auction[6])
         channel_id = int(auction[1])
 
@@ -855,39 +792,34 @@ class AuctionBot(commands.Cog):
         if not channel:
             return await ctx.send("❌ Auction channel not found.")
 
-        # Determine current highest bid
-        self.cursor.execute(
-            "SELECT user_id, bid_amount FROM bids WHERE auction_id = ? ORDER BY bid_amount DESC LIMIT 1",
-            (auction_id, ))
-        result = self.cursor.fetchone()
+        # Waits for an in-flight bid so it is counted before the close. The
+        # auction keeps taking bids and its deadline until the close is
+        # written, so a failed close leaves it open rather than stranded
+        async with self.auctions.lock(auction_id):
+            # The leading bid, kept on the auction row by every accepted bid
+            result = await self.repo.get_top_bid(auction_id)
 
-        if result and result[0] and result[1] and int(result[1]) > 0:
-            winner_id = str(result[0])
-        else:
-            winner_id = None
+            if result and result[0] and result[1] and int(result[1]) > 0:
+                winner_id = str(result[0])
+            else:
+                winner_id = None
 
-        final_bid = int(result[1]) if result and result[1] else 0
+            final_bid = int(result[1]) if result and result[1] else 0
 
-        self.cursor.execute(
-            "UPDATE auctions SET winner_id = ? WHERE auction_id = ?",
-            (winner_id, auction_id))
-        self.db.commit()
+            # The expiry pass may have closed it while we waited for the lock
+            closed = await self.repo.close_auction(auction_id, winner_id,
+                                                   final_bid)
+            if closed:
+                self._retire(auction_id)
+
+        if not closed:
+            return await ctx.send("❌ This auction has already ended.")
 
         # Create auction-logs channel if it doesn't exist
-        logs_channel = discord.utils.get(ctx.guild.channels,
-                                         name="auction-logs")
-        if not logs_channel:
-            try:
-                logs_channel = await ctx.guild.create_text_channel(
-                    "auction-logs")
-            except Exception as e:
-                logs_channel = None
-                print(f"Failed to create logs channel: {e}")
+        logs_channel = await self.channels.logs_channel(ctx.guild)
 
         # Format time
-        end_time = datetime.now(self.timezone)
-        unix_time = int(end_time.timestamp())
-        discord_time = f"<t:{unix_time}:f>"
+        discord_time = f"<t:{int(time.time())}:f>"
 
         # Build message
         if winner_id:
@@ -900,7 +832,7 @@ class AuctionBot(commands.Cog):
 
         # Send log embed
         if logs_channel:
-            embed = get_pokemon_data(self.cursor, auction_id)
+            embed = await get_pokemon_data(self.repo, auction_id)
             if embed:
                 embed.title = f"🛑 Auction Ended Early: {embed.title}"
                 embed.color = discord.Color.orange()
@@ -918,7 +850,8 @@ class AuctionBot(commands.Cog):
                 )
 
         try:
-            await channel.delete(reason="Auction ended early by creator.")
+            await self.pool.release(channel,
+                                    reason="Auction ended early by creator.")
         except Exception as e:
             print(f"Failed to delete channel: {e}")
 
@@ -939,51 +872,38 @@ class AuctionBot(commands.Cog):
             return
 
         # Fetch the specified auction
-        self.cursor.execute(
-            """
-            SELECT channel_id, message_id, pokemon_name, buyout_price, min_bid, interval, end_time, auctioneer_id
-            FROM auctions
-            WHERE auction_id = ? AND winner_id IS NULL
-        """, (auction_id, ))
-        row = self.cursor.fetchone()
-
-        print(row)
+        row = await self.repo.get_open_auction(auction_id)
+
         if not row:
             await ctx.send("❌ No active auction found with that ID.")
             return
 
-        channel_id, message_id, pokemon_name, buyout, min_bid, interval, end_time, auctioneer_id = row
+        channel_id = row["channel_id"]
+        message_id = row["message_id"]
+        buyout = row["buyout_price"]
+        auctioneer_id = row["auctioneer_id"]
 
         if str(ctx.author.id) != str(auctioneer_id):
             await ctx.send("🚫 You are not the auctioneer of this auction.")
             return
 
-        # Fetch message
+        # Fetch message (only the first time, the embed is cached after that)
         try:
-            channel = self.bot.get_channel(int(channel_id))
-            message = await channel.fetch_message(int(message_id))
+            await self.embeds.load(auction_id, channel_id, message_id)
+        except LookupError:
+            await ctx.send("❌ Auction embed not found.")
+            return
         except Exception as e:
             await ctx.send(
                 f"❌ Could not fetch the auction message: {type(e).__name__}")
             return
 
-        embed = message.embeds[0] if message.embeds else None
-        if not embed:
-            await ctx.send("❌ Auction embed not found.")
-            return
-
         try:
             if option == "time":
                 minutes = int(value) * 60
-                new_end = datetime.now(
-                    self.timezone) + timedelta(minutes=minutes)
-                new_end_str = new_end.isoformat()
-                new_unix = int(new_end.timestamp())
-                self.cursor.execute(
-                    "UPDATE auctions SET end_time = ? WHERE auction_id = ?",
-                    (new_end_str, auction_id))
-                embed.description = re.sub(r"<t:\d+:f>", f"<t:{new_unix}:f>",
-                                           embed.description)
+                new_value = new_deadline = int(time.time()) + minutes * 60
+                pattern = r"<t:\d+:f>"
+                replacement = f"<t:{new_deadline}:f>"
 
             elif option == "minbid":
                 new_min = int(value)
@@ -992,34 +912,39 @@ class AuctionBot(commands.Cog):
                         f"❌ Minimum bid amount must be less than the buyout price ({buyout:,})."
                     )
                     return
-                self.cursor.execute(
-                    "UPDATE auctions SET min_bid = ? WHERE auction_id = ?",
-                    (new_min, auction_id))
-                embed.description = re.sub(r"\*\*Min Bid:\*\* [\d,]+",
-                                           f"**Min Bid:** {new_min:,}",
-                                           embed.description)
+                new_value = new_min
+                pattern = r"\*\*Min Bid:\*\* [\d,]+"
+                replacement = f"**Min Bid:** {new_min:,}"
 
             elif option == "interval":
                 new_interval = int(value)
-                self.cursor.execute(
-                    "UPDATE auctions SET interval = ? WHERE auction_id = ?",
-                    (new_interval, auction_id))
-                embed.description = re.sub(r"\*\*Interval:\*\* [\d,]+",
-                                           f"**Interval:** {new_interval:,}",
-                                           embed.description)
+                new_value = new_interval
+                pattern = r"\*\*Interval:\*\* [\d,]+"
+                replacement = f"**Interval:** {new_interval:,}"
 
             elif option == "buyout":
                 new_buyout = int(value)
-                self.cursor.execute(
-                    "UPDATE auctions SET buyout_price = ? WHERE auction_id = ?",
-                    (new_buyout, auction_id))
-                embed.description = re.sub(r"\*\*Buyout:\*\* [\d,]+",
-                                           f"**Buyout:** {new_buyout:,}",
+                new_value = new_buyout
+                pattern = r"\*\*Buyout:\*\* [\d,]+"
+                replacement = f"**Buyout:** {new_buyout:,}"
+
+            def apply_edit(embed):
+                embed.description = re.sub(pattern, replacement,
                                            embed.description)
 
             # Apply edit
-            await message.edit(embed=embed)
-            self.db.commit()
+            # A bid validated against the old rules commits before the edit
+            async with self.auctions.lock(auction_id):
+                await self.repo.update_auction(auction_id, option, new_value)
+                cached = self.auctions.get(auction_id)
+                if option == "time":
+                    self.scheduler.schedule(auction_id, new_deadline)
+                    if cached:
+                        cached.end_time = new_deadline
+                elif cached:
+                    setattr(cached, EDITABLE_COLUMNS[option], new_value)
+            await self.embeds.update(auction_id, channel_id, message_id,
+                                     apply_edit)
             await ctx.send(
                 f"✅ Auction `{auction_id}` updated: `{option}` set to `{value}`."
             )
@@ -1036,21 +961,181 @@ class AuctionBot(commands.Cog):
         else:
             raise error
 
+    @commands.hybrid_command(
+        name="search", description="Search current and past auctions.")
+    async def search_auctions(self, ctx, *, query: str):
+        """Full-text search over auction embeds, e.g. ``garchomp hp:31``."""
+        match = fts_query(query)
+        if match is None:
+            return await ctx.send("❌ Please enter something to search for.")
+
+        view = SearchResultsView(ctx, self.repo, query, match)
+        await view.send_page()
+
+    @commands.hybrid_command(
+        name="pricehistory",
+        description="What a Pokémon has sold for in past auctions.")
+    async def price_history(self,
+                            ctx,
+                            pokemon: str,
+                            variant: Literal["any", "normal", "shiny",
+                                             "radiant", "gleam", "alpha",
+                                             "shadow"] = "any",
+                            min_iv: int = 0):
+        """Show sale prices for a Pokémon, optionally by variant and IV."""
+        summary = await self.repo.get_price_history(
+            pokemon, None if variant == "any" else variant, min_iv)
+
+        label = pokemon.title()
+        if variant != "any":
+            label = f"{variant.title()} {label}"
+        band = iv_band(min_iv)
+        if band:
+            label += f" ({band}%+ IV)"
+
+        if not summary.sales:
+            return await ctx.send(f"📉 No recorded sales for {label}.")
+
+        embed = Embed(title=f"💹 Price History: {label}", color=0x2ecc71)
+        embed.add_field(name="Sales", value=f"{summary.sales:,}")
+        embed.add_field(name="Median", value=f"{summary.quantile(0.5):,}")
+        embed.add_field(name="Average", value=f"{round(summary.average):,}")
+        embed.add_field(name="Lowest", value=f"{summary.min_price:,}")
+        embed.add_field(name="Highest", value=f"{summary.max_price:,}")
+        embed.add_field(
+            name="Last Sale",
+            value=f"{summary.last_price:,} (<t:{summary.last_sold_at}:R>)")
+        embed.set_footer(
+            text=f"Median is estimated; IV is grouped in {IV_BAND}% bands.")
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(
+        name="perfstats",
+        description="Show command, database and Discord API latencies.")
+    @commands.is_owner()
+    async def perfstats(self, ctx):
+        """Summarise the in-process metrics (bot owner only)."""
+        embed = Embed(title="📈 Performance", color=0x3498db)
+
+        def table(histograms, limit=10, width=24, key=None):
+            rows = sorted(histograms.items(),
+                          key=key or (lambda item: -item[1].count))[:limit]
+            lines = [f"{'name':<{width}} {'n':>6} {'p50 ms':>7} {'p99 ms':>7}"]
+            for label, h in rows:
+                name = str(label or "-")
+                if len(name) > width:
+                    name = name[:width - 1] + "…"
+                lines.append(f"{name:<{width}} {h.count:>6} "
+                             f"{h.quantile(0.5) * 1000:>7.2f} "
+                             f"{h.quantile(0.99) * 1000:>7.2f}")
+            return f"```{chr(10).join(lines)}```"
+
+        commands_seen = METRICS.histograms("command_seconds")
+        if commands_seen:
+            embed.add_field(name="Commands",
+                            value=table(commands_seen),
+                            inline=False)
+
+        queries = METRICS.histograms("db_query_seconds")
+        if queries:
+            # Most total time first, that's what is worth optimising
+            embed.add_field(name="Queries (by total time)",
+                            value=table(queries,
+                                        limit=8,
+                                        width=32,
+                                        key=lambda item: -item[1].sum),
+                            inline=False)
+
+        calls = METRICS.histograms("discord_request_seconds")
+        if calls:
+            errors = METRICS.counters("discord_errors_total")
+            value = table(calls)
+            if errors:
+                value += "Errors: " + ", ".join(
+                    f"{call} {count}" for call, count in sorted(errors.items()))
+            embed.add_field(name="Discord API", value=value, inline=False)
+
+        passes = METRICS.histograms("check_auctions_seconds")
+        if passes:
+            embed.add_field(name="Expiry passes",
+                            value=table({"check_auctions": passes[None]}),
+                            inline=False)
+
+        updates = METRICS.counters("embed_updates_total")
+        if updates:
+            requested = updates.get("requested", 0)
+            saved = updates.get("saved", 0)
+            embed.add_field(
+                name="Embed edits",
+                value=(f"{requested:,} updates, "
+                       f"{updates.get('published', 0):,} edits sent, "
+                       f"{saved:,} saved "
+                       f"({saved / requested if requested else 0:.0%})\n"
+                       f"{updates.get('fetched', 0):,} fetches, "
+                       f"{updates.get('failed', 0):,} failed, "
+                       f"{updates.get('rate_limited', 0):,} rate limited"),
+                inline=False)
+
+        notices = METRICS.counters("outbid_notices_total")
+        if notices:
+            embed.add_field(
+                name="Outbid notices",
+                value=(f"{notices.get('recorded', 0):,} recorded, "
+                       f"{notices.get('sent', 0):,} DMs, "
+                       f"{notices.get('fallback', 0):,} channel mentions, "
+                       f"{notices.get('dropped', 0):,} dropped"),
+                inline=False)
+
+        if not embed.fields:
+            embed.description = "No measurements yet."
+        await ctx.send(embed=embed)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        await self.channels.forget(channel)
+        await self.pool.forget(channel)
+
     @commands.Cog.listener()
     async def on_ready(self):
-        self.check_auctions.start()
+        # on_ready fires again after reconnects, only build the heap once
+        if not self.scheduler.running:
+            await self.load_state()
+            self.scheduler.start()
+        if not self.notifier.running:
+            await self.notifier.load()
+            self.notifier.start()
+        if not self.pool.running:
+            self.pool.start()
+        if not self.snapshots.running:
+            self.snapshots.start()
+        if not self.archiver.running:
+            self.archiver.start()
+        if self.exporter.enabled and not self.exporter.running:
+            await self.exporter.start()
         await self.bot.tree.sync()
 
-    async def cog_check(self, ctx):
-        allowed_guilds = {
-            998128574898896906, 1188747974378008626, 1307241112716709898
-        }
+    async def cog_unload(self):
+        self.scheduler.stop()
+        self.notifier.stop()
+        self.exporter.stop()
+        self.pool.stop()
+        self.snapshots.stop()
+        self.archiver.stop()
+        self.embeds.close()
+        self.colors.close()
+        if getattr(self.bot, "repo", None) is not self.repo:
+            self.repo.close()
 
+    async def cog_check(self, ctx):
         if ctx.guild is None:
             await ctx.send("❌ This command can only be used in a server.")
             return False
 
-        if ctx.guild.id not in allowed_guilds:
+        # Owner-only; /auctionguild has to work inside a server to allow it
+        if ctx.command in (self.toggle_guild, self.perfstats):
+            return True
+
+        if not self.permissions.is_guild_allowed(ctx.guild.id):
             await ctx.send(
                 "🚫 This server is not authorized to use this command.")
             return False
@@ -1058,13 +1143,88 @@ class AuctionBot(commands.Cog):
         return True
 
 
-class AuctionListView(View):
+def render_auction_page(rows):
+    lines = ["ID   | Name       | Ends In       | Current Bid", "-" * 45]
+    now = time.time()
+
+    for auction in rows:
+        auction_id = str(auction[0])
+        pokemon_name = auction[4]
+        current_bid = int(auction[3] or 0)
+
+        time_remaining = auction[2] - now
+        if time_remaining < 0:
+            ends_in = "Ended"
+        else:
+            hrs, rem = divmod(int(time_remaining), 3600)
+            mins, _ = divmod(rem, 60)
+            ends_in = f"{hrs}h {mins}m" if hrs else f"{mins}m"
 
-    def __init__(self, ctx, pages):
+        lines.append(
+            f"{auction_id:<4} | {pokemon_name:<10} | {ends_in:<12} | {current_bid:,}"
+        )
+
+    embed = Embed(title="📢 Active Auctions", color=0x3498db)
+    embed.description = f"```{chr(10).join(lines)}```"
+    return embed
+
+
+def render_search_page(rows, query):
+    now = time.time()
+    lines = []
+    for row in rows:
+        if row["closed_at"] is not None:
+            if row["winner_id"]:
+                status = f"sold for {int(row['current_bid'] or 0):,}"
+            else:
+                status = "ended, no bids"
+        elif row["end_time"] <= now:
+            status = "ending"
+        else:
+            status = (f"open, ends <t:{row['end_time']}:R>, "
+                      f"bid {int(row['current_bid'] or 0):,}")
+        # Drop the stored markdown, then bold what matched
+        excerpt = " ".join(row["excerpt"].replace("**", "").split())
+        excerpt = excerpt.replace("\x02", "**").replace("\x03", "**")
+        lines.append(f"**#{row['auction_id']}** {row['pokemon_name']} "
+                     f"({status})\n{excerpt}")
+    return Embed(title=f"🔎 Search: {query}",
+                 description="\n\n".join(lines),
+                 color=0x3498db)
+
+
+class AuctionListView(View):
+    """Pages through active auctions, reading each page when it's shown.
+
+    Pages are fetched with keyset pagination on ``(end_time, auction_id)``
+    or, sorted by price, ``(current_bid, auction_id)``, so every page is one
+    indexed range read however many auctions are open.
+    The view keeps the cursor of each page it has visited and only the last
+    ``cached_pages`` rendered pages.
+    """
+
+    def __init__(self,
+                 ctx,
+                 repo,
+                 per_page=9,
+                 cached_pages=3,
+                 total=None,
+                 sort="ending",
+                 variant=None,
+                 min_iv=None):
         super().__init__(timeout=120)
         self.ctx = ctx
-        self.pages = pages
+        self.repo = repo
+        self.sort = sort
+        self.variant = variant
+        self.min_iv = min_iv
+        self.per_page = per_page
+        self.cached_pages = cached_pages
+        self.total = total
         self.current_page = 0
+        # cursors[i] is the (sort key, auction_id) page i starts after
+        self.cursors = [None]
+        self._pages = OrderedDict()
         # self.update_buttons()
 
     # def update_buttons(self):
@@ -1080,22 +1240,81 @@ class AuctionListView(View):
     #                    style=ButtonStyle.secondary,
     #                    custom_id="next"))
 
+    async def load_page(self, index):
+        """Return ``(embed, has_next)`` for a page, or None if it's empty."""
+        page = self._pages.get(index)
+        if page is not None:
+            self._pages.move_to_end(index)
+            return page
+
+        # One extra row tells whether there is a next page
+        rows = await self.fetch(self.cursors[index], self.per_page + 1)
+        if not rows:
+            return None
+
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if index + 1 == len(self.cursors):
+            self.cursors.append(self.cursor_of(rows[-1]))
+
+        page = (self.render(rows), has_next)
+        self._pages[index] = page
+        while len(self._pages) > self.cached_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    async def fetch(self, cursor, limit):
+        return await self.repo.list_active_page(int(time.time()),
+                                                cursor,
+                                                limit,
+                                                sort=self.sort,
+                                                variant=self.variant,
+                                                min_iv=self.min_iv)
+
+    def cursor_of(self, row):
+        if self.sort == "price":
+            return (row[3] or 0, row[0])
+        return (row[2], row[0])
+
+    def render(self, rows):
+        return render_auction_page(rows)
+
+    def empty_embed(self):
+        return Embed(title="📢 Active Auctions",
+                     description="No active auctions at the moment.",
+                     color=0x3498db)
+
     async def interaction_check(self, interaction: Interaction) -> bool:
         return interaction.user == self.ctx.author
 
     async def on_timeout(self):
+        self._pages.clear()
         for item in self.children:
             item.disabled = True
         await self.message.edit(view=self)
 
     async def send_page(self, interaction: Interaction = None):
-        embed = self.pages[self.current_page]
-        embed.set_footer(
-            text=f"Page {self.current_page + 1} of {len(self.pages)}")
+        page = await self.load_page(self.current_page)
+        while page is None and self.current_page > 0:
+            # Everything past here closed since the previous page was read
+            self.current_page -= 1
+            page = await self.load_page(self.current_page)
+            if page is not None:
+                page = (page[0], False)
+        if page is None:
+            page = (self.empty_embed(), False)
+
+        embed, has_next = page
+        if self.total:
+            pages = max(self.current_page + 1,
+                        -(-self.total // self.per_page))
+            embed.set_footer(text=f"Page {self.current_page + 1} of {pages}")
+        else:
+            embed.set_footer(text=f"Page {self.current_page + 1}")
 
         # Update button states
         self.prev_page.disabled = self.current_page == 0
-        self.next_page.disabled = self.current_page == len(self.pages) - 1
+        self.next_page.disabled = not has_next
 
         if interaction:
             await interaction.response.edit_message(embed=embed, view=self)
@@ -1115,6 +1334,32 @@ class AuctionListView(View):
         await self.send_page(interaction)
 
 
+class SearchResultsView(AuctionListView):
+    """Pages through /search results, newest auction first.
+
+    Same paging as AuctionListView, keyed on the auction id alone.
+    """
+
+    def __init__(self, ctx, repo, query, match, per_page=5, **kwargs):
+        super().__init__(ctx, repo, per_page=per_page, **kwargs)
+        self.query = query
+        self.match = match
+
+    async def fetch(self, cursor, limit):
+        return await self.repo.search_auctions(self.match, cursor, limit)
+
+    def cursor_of(self, row):
+        return row["auction_id"]
+
+    def render(self, rows):
+        return render_search_page(rows, self.query)
+
+    def empty_embed(self):
+        return Embed(title=f"🔎 Search: {self.query}",
+                     description="No auctions match.",
+                     color=0x3498db)
+
+
 async def setup(bot):
     await bot.add_cog(AuctionBot(bot))
     await bot.tree.sync()
@@ -0,0 +1,63 @@
+"""Micro-benchmark: Counter-over-tuples vs. NumPy bucketed dominant color.
+
+Both are timed at the baseline's 100x100 resize, so the difference is the
+histogram alone. The NumPy path at its default ``COLOR_RESIZE`` is reported
+on its own line; the gap between the two NumPy lines is the smaller resize.
+
+Run from the repository root:
+
+    python benchmarks/bench_color.py
+"""
+import os
+import sys
+import timeit
+from collections import Counter
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auction import COLOR_RESIZE, dominant_rgb  # noqa: E402
+
+# The resize the original implementation used
+BASELINE_SIZE = (100, 100)
+
+
+def counter_rgb(img, size=BASELINE_SIZE):
+    """The original implementation, kept here as the baseline."""
+    img = img.convert("RGBA").resize(size)
+    pixels = [(r, g, b) for r, g, b, a in img.getdata() if a > 50]
+    if not pixels:
+        raise ValueError("All pixels are transparent.")
+    return Counter(pixels).most_common(1)[0][0]
+
+
+def make_sprite(size=475, seed=0):
+    """A noisy sprite-like image: a shaded blob on a transparent background."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:size, :size]
+    inside = (xx - size / 2)**2 + (yy - size / 2)**2 < (size / 3)**2
+    base = np.array([200, 80, 40], dtype=np.int16)
+    noise = rng.integers(-12, 12, size=(size, size, 3))
+    rgb = np.clip(base + noise, 0, 255).astype(np.uint8)
+    alpha = np.where(inside, 255, 0).astype(np.uint8)
+    return Image.fromarray(np.dstack([rgb, alpha]), "RGBA")
+
+
+def main(number=50):
+    img = make_sprite()
+    runs = (
+        ("counter", counter_rgb, BASELINE_SIZE),
+        ("numpy", dominant_rgb, BASELINE_SIZE),
+        ("numpy", dominant_rgb, COLOR_RESIZE),
+    )
+    for name, fn, size in runs:
+        seconds = timeit.timeit(lambda: fn(img, size=size), number=number)
+        label = f"{name} {size[0]}x{size[1]}"
+        print(f"{label:<16} {seconds / number * 1000:8.2f} ms/call  "
+              f"-> {fn(img, size=size)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Throughput and latency of every AuctionBot command, offline.
+
+The cog runs against a temporary database and the fake Discord layer in
+fakes.py. The database is seeded to production scale first (open auctions
+with their channels and messages, plus closed auctions carrying the bid
+history), then each command is driven through its callback and timed:
+
+    /auction, /bid, /list, /edit, /endearly, the expiry pass,
+    /pricehistory, /search and finally one archive pass, which moves the
+    history older than 30 days out of the live tables
+
+    python benchmarks/bench_commands.py [open_auctions] [historical_bids]
+        [--latency SECONDS] [--pool SIZE]
+
+``--latency`` adds that much delay to every fake Discord call; the default of
+0 measures the bot's own overhead. ``--pool`` turns on the channel pool for
+the guild with that many spare channels, warmed in the background.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+from discord import app_commands  # noqa: E402
+
+from archive import Archiver  # noqa: E402
+from auction import AuctionBot  # noqa: E402
+from database import AuctionRepository, initialize_database  # noqa: E402
+from fakes import FakeAPI, FakeBot, FakeContext  # noqa: E402
+from metrics import METRICS  # noqa: E402
+from pokemon_parser import ParsedPokemon  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "fixtures", "mewbot_embeds.json")
+
+BIDS_PER_CLOSED_AUCTION = 20
+
+
+def seed_history(path, auctioneer_id, bidder_ids, historical_bids):
+    """Closed auctions with their bids, written straight to the database."""
+    conn = sqlite3.connect(path)
+    now = time.time()
+    auctions = max(1, historical_bids // BIDS_PER_CLOSED_AUCTION)
+    with conn:
+        for n in range(auctions):
+            ended = int(now - random.uniform(3600, 90 * 86400))
+            bids = [(str(random.choice(bidder_ids)), 100 + step * 10,
+                     ended - (BIDS_PER_CLOSED_AUCTION - step) * 60)
+                    for step in range(BIDS_PER_CLOSED_AUCTION)]
+            auction_id = conn.execute(
+                "INSERT INTO auctions (channel_id, message_id, item_embed_url, "
+                "end_time, auctioneer_id, min_bid, interval, current_bid, "
+                "winner_id, pokemon_name, closed_at, leader_id, bid_count, "
+                "last_bid_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(n), str(n), "https://example/1/2/3", ended,
+                 str(auctioneer_id), 100, 10, bids[-1][1], bids[-1][0],
+                 f"Pokemon {n}", ended, bids[-1][0], len(bids),
+                 bids[-1][2])).lastrowid
+            conn.executemany(
+                "INSERT INTO bids (auction_id, user_id, bid_amount, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                [(auction_id, ) + bid for bid in bids])
+            conn.execute(
+                "INSERT INTO auctioned_pokemon (global_id, last_auction_end) "
+                "VALUES (?, ?)", (f"h{n}", ended))
+            conn.execute(
+                "INSERT INTO pokemon_embeds (auction_id, title, description, "
+                "fields) VALUES (?, ?, ?, ?)",
+                (auction_id, f"Pokemon {n}", stats_description(), "[]"))
+    conn.close()
+
+
+def stats_description():
+    stats = "\n".join(
+        f"• **{stat}:** {random.randint(5, 255)} | {random.randint(0, 31)} | 0"
+        for stat in ("HP", "Attack", "Defense", "Sp. Atk", "Sp. Def", "Speed"))
+    return f"**Level:** {random.randint(1, 100)}\n{stats}"
+
+
+async def seed_open(cog, guild, auctioneer, count):
+    """Open auctions with a channel and a live auction message each."""
+    category = await guild.create_category("Auctions")
+    now = time.time()
+    for n in range(count):
+        channel = await guild.create_text_channel(f"auction-{n}",
+                                                  category=category)
+        end_time = int(now + random.uniform(3600, 48 * 3600))
+        auction_id = await cog.repo.create_auction(
+            f"o{n}",
+            channel.id,
+            "https://example/1/2/3",
+            None,
+            end_time,
+            auctioneer.id,
+            100,
+            10,
+            f"Pokemon {n}",
+            pokemon=ParsedPokemon(name=f"Pokemon {n % 10}",
+                                  variant=random.choice(
+                                      ["", "shiny", "radiant", "alpha"]),
+                                  iv_percent=random.uniform(0, 100)))
+        desc = "**Level:** 100\n**IV %:** 80.00%"
+        embed = discord.Embed(title=f"Pokemon {n}",
+                              description=(f"{desc}\n\n"
+                                           "💰 **Min Bid:** 100\n"
+                                           "🔼 **Interval:** 10\n"
+                                           "🏷️ **Buyout:** *None*\n"
+                                           f"⏰ **Ends:** <t:{end_time}:f>"))
+        message = await channel.send(embed=embed)
+        await cog.repo.set_message_id(auction_id, message.id)
+        await cog.repo.save_pokemon_embed(auction_id, embed.title, desc, "[]")
+
+
+def load_sources():
+    with open(FIXTURES, encoding="utf-8") as fh:
+        fixtures = json.load(fh)
+    return [discord.Embed.from_dict(entry)
+            for entry in fixtures["captured"] + fixtures["synthetic"]]
+
+
+class Timings:
+
+    def __init__(self):
+        self.results = []
+
+    async def run(self, name, calls):
+        """Await each coroutine factory in turn, recording its latency."""
+        latencies = []
+        start = time.perf_counter()
+        for call in calls:
+            begin = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - begin)
+        elapsed = time.perf_counter() - start
+        self.results.append((name, latencies, elapsed))
+
+    def report(self):
+        print(f"{'command':<14} {'n':>6} {'ops/s':>10} {'p50 ms':>8} "
+              f"{'p99 ms':>8}")
+        for name, latencies, elapsed in self.results:
+            latencies = sorted(latencies)
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000
+            print(f"{name:<14} {len(latencies):>6} "
+                  f"{len(latencies) / elapsed:>10,.0f} {p50:>8.3f} {p99:>8.3f}")
+
+
+async def main(open_auctions=500,
+               historical_bids=100_000,
+               latency=0.0,
+               pool=0):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    initialize_database(path)
+
+    bot = FakeBot(FakeAPI(latency=latency))
+    guild = bot.add_guild()
+    auctioneer = bot.add_user()
+    bidders = [bot.add_user() for _ in range(500)]
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("INSERT INTO auctioneers (user_id) VALUES (?)",
+                     (str(auctioneer.id), ))
+        conn.execute("INSERT INTO allowed_guilds (guild_id) VALUES (?)",
+                     (str(guild.id), ))
+    conn.close()
+
+    seed_start = time.perf_counter()
+    seed_history(path, auctioneer.id, [user.id for user in bidders],
+                 historical_bids)
+
+    bot.repo = AuctionRepository(path)
+    cog = AuctionBot(bot)
+    await cog.cog_load()
+    await seed_open(cog, guild, auctioneer, open_auctions)
+    await cog.load_state()
+    print(f"Seeded {open_auctions} open auctions and {historical_bids:,} "
+          f"historical bids in {time.perf_counter() - seed_start:.1f}s")
+
+    # Source messages for /auction, with the sprite colors already cached so
+    # no image is downloaded
+    sources = load_sources()
+    source_channel = await guild.create_text_channel("pokemon")
+    for embed in sources:
+        cog.colors._cache[embed.image.url] = discord.Color.blurple()
+    if pool:
+        await cog.pool.set_size(guild, pool)
+        await cog.pool.refill(guild)
+        cog.pool.start()
+    bot.api.calls.clear()
+
+    timings = Timings()
+    open_ids = [auction.auction_id for auction in cog.auctions]
+    listing = app_commands.Choice(name="Auctions", value="auctions")
+
+    def ctx_for(user, slash=False):
+        return FakeContext(bot, guild, user, source_channel, slash)
+
+    def bid(auction_id):
+
+        async def call():
+            auction = cog.auctions.get(auction_id)
+            amount = max(auction.current_bid or 0, auction.min_bid) + 10
+            await AuctionBot.place_bid.callback(cog,
+                                                ctx_for(
+                                                    random.choice(bidders)),
+                                                auction_id, amount)
+
+        return call
+
+    def edit(auction_id, option, value):
+        return lambda: AuctionBot.edit_auction.callback(
+            cog, ctx_for(auctioneer), auction_id, option, value)
+
+    def start(n):
+
+        async def call():
+            embed = sources[n % len(sources)].copy()
+            embed.set_footer(text=f"Global ID#: {900000 + n} | Page 1")
+            message = await source_channel.send(embed=embed)
+            url = (f"https://discord.com/channels/{guild.id}/"
+                   f"{source_channel.id}/{message.id}")
+            await AuctionBot.start_auction.callback(cog,
+                                                    ctx_for(auctioneer,
+                                                            slash=True), url,
+                                                    24, 100, 10)
+
+        return call
+
+    async def expire(auction_ids):
+        past = int(time.time()) - 1
+        for auction_id in auction_ids:
+            await cog.repo.update_auction(auction_id, "time", past)
+
+    def end_early(auction_id):
+        return lambda: AuctionBot.end_early.callback(cog, ctx_for(auctioneer),
+                                                     auction_id)
+
+    # Everything the commands print is part of their cost but not the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        await timings.run(
+            "/list", [lambda: AuctionBot.list_auctions.callback(
+                cog, ctx_for(auctioneer), listing)] * 50)
+        await timings.run("/list filter", [
+            lambda: AuctionBot.list_auctions.callback(cog,
+                                                      ctx_for(auctioneer),
+                                                      listing,
+                                                      variant="alpha",
+                                                      min_iv=80,
+                                                      sort="price")
+        ] * 50)
+        await timings.run(
+            "/bid", [bid(random.choice(open_ids)) for _ in range(2000)])
+        await timings.run("/edit", [
+            edit(random.choice(open_ids), option, value)
+            for option, value in [("minbid", "50"), ("interval", "5"),
+                                  ("buyout", "1000000"), ("time", "12")] * 50
+        ])
+        await timings.run("/auction", [start(n) for n in range(100)])
+
+        random.shuffle(open_ids)
+        # A fifth of the open auctions expire in batches of 5, a tenth more
+        # are ended early
+        expiring = len(open_ids) // 5
+        expiry_batches = [
+            open_ids[i:i + 5] for i in range(0, expiring, 5)
+        ]
+        early = open_ids[expiring:expiring + len(open_ids) // 10]
+
+        # Expiring a batch is setup, only the pass itself is timed
+        latencies = []
+        for batch in expiry_batches:
+            await expire(batch)
+            begin = time.perf_counter()
+            await cog.check_auctions()
+            latencies.append(time.perf_counter() - begin)
+        timings.results.append(("expiry pass", latencies, sum(latencies)))
+
+        await timings.run("/endearly", [end_early(aid) for aid in early])
+        await timings.run("/search", [
+            lambda n=n: AuctionBot.search_auctions.callback(
+                cog, ctx_for(auctioneer), query=f"pokemon hp:{n % 32}")
+            for n in range(50)
+        ])
+        await timings.run("/pricehistory", [
+            lambda n=n: AuctionBot.price_history.callback(
+                cog, ctx_for(auctioneer), f"Pokemon {n % 10}", "any", 50)
+            for n in range(50)
+        ])
+
+        begin = time.perf_counter()
+        archived = await Archiver(cog.repo).run_once()
+        elapsed = time.perf_counter() - begin
+        timings.results.append(("archive pass", [elapsed], elapsed))
+
+    timings.report()
+    print("Archived {} auctions, expired {} auctioned Pokémon, "
+          "freed {} pages".format(*archived))
+    print(f"Discord calls: {bot.api.calls}")
+    updates = METRICS.counters("embed_updates_total")
+    print("Embeds: " + ", ".join(f"{count:,} {outcome}"
+                                 for outcome, count in sorted(updates.items())))
+    if pool:
+        print(f"Channel pool: {cog.pool.stats}")
+
+    await cog.cog_unload()
+    bot.repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("open_auctions", nargs="?", type=int, default=500)
+    parser.add_argument("historical_bids", nargs="?", type=int,
+                        default=100_000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--pool", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.open_auctions, args.historical_bids, args.latency,
+             args.pool))
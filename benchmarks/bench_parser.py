@@ -0,0 +1,114 @@
+"""Parses per second for parse_pokemon_embed over the fixture corpus.
+
+The corpus in fixtures/mewbot_embeds.json holds Mewbot /info embeds as
+``Embed.to_dict()`` payloads, each with the fields the parser must recover.
+``captured`` embeds come from real messages (see capture_embeds.py);
+``synthetic`` ones are hand-written to Mewbot's layout and only show that
+the parser handles the formats written out there (see the file's ``note``).
+The expectations are checked first, then both the parser and the original
+inline implementation are timed.
+
+    python benchmarks/bench_parser.py [iterations]
+"""
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+
+from pokemon_parser import KNOWN_NATURES, parse_pokemon_embed  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "fixtures", "mewbot_embeds.json")
+
+
+def legacy_parse(embed):
+    """The parsing block that used to live inline in start_auction."""
+    title = embed.title or ""
+    footer_text = embed.footer.text if embed.footer else ""
+    re.search(r"Global ID#:\s*(\d+)", footer_text)
+    re.search(r"<:lvl:\d+>\s*(\d+)", title)
+    clean_title = re.sub(r"<:\w+:\d+>", "", title)
+    clean_title = re.sub(r":\w+:", "", clean_title)
+    clean_title = re.sub(r"\b\d+\b", "", clean_title)
+    words = clean_title.strip().lower().split()
+    title = " ".join(word for word in words if word not in KNOWN_NATURES)
+    description = embed.description or ""
+    field_values = "\n".join(f.value for f in embed.fields)
+    text_block = f"{description}\n{field_values}"
+    re.search(r"'([^']+)'", title)
+    title_wo_emojis = re.sub(r"<a?:\w+:\d+>", "", title)
+    title_wo_emojis = re.sub(r":[^:\s]+:", "", title_wo_emojis)
+    title_wo_emojis = re.sub(r"['\"`]", "", title_wo_emojis)
+    title_cleaned = re.sub(r"\b\d+\b", "", title_wo_emojis)
+    for nature in KNOWN_NATURES:
+        title_cleaned = re.sub(rf"\b{nature}\b",
+                               "",
+                               title_cleaned,
+                               flags=re.IGNORECASE)
+    re.search(r'IV %.*?(\d+\.\d+)%', text_block)
+    re.search(r"(?:Holding|Held Item)\s*:\s*(?:<:\w+:\d+>\s*)?(.*?)(?:\n|$)",
+              text_block, re.IGNORECASE)
+    re.search(r"\*\*Hidden Power\*\*:\s*(?:`)?(.*?)(?:`)?(?:\n|$)",
+              text_block, re.IGNORECASE)
+    for stat in ['HP', 'Attack', 'Defense', 'Sp. Atk', 'Sp. Def', 'Speed']:
+        re.search(rf"{stat}:\s*(\d+).*?(\d+)\s*\|\s*(\d+)", text_block)
+
+
+def load_fixtures():
+    """The fixture file's ``(captured, synthetic)`` entry lists."""
+    with open(FIXTURES, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    return fixtures["captured"], fixtures["synthetic"]
+
+
+def load_corpus():
+    captured, synthetic = load_fixtures()
+    return [(discord.Embed.from_dict(entry), entry["expected"])
+            for entry in captured + synthetic]
+
+
+def check(corpus):
+    failures = 0
+    for embed, expected in corpus:
+        parsed = parse_pokemon_embed(embed)
+        for key, value in expected.items():
+            if getattr(parsed, key) != value:
+                failures += 1
+                print(f"FAIL {embed.title!r}: {key} = "
+                      f"{getattr(parsed, key)!r}, expected {value!r}")
+        if len(parsed.stats) != 6:
+            failures += 1
+            print(f"FAIL {embed.title!r}: parsed {len(parsed.stats)} stats")
+    return failures
+
+
+def bench(fn, corpus, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for embed, _ in corpus:
+            fn(embed)
+    return iterations * len(corpus) / (time.perf_counter() - start)
+
+
+def main(iterations=2000):
+    captured, synthetic = load_fixtures()
+    corpus = load_corpus()
+    failures = check(corpus)
+    print(f"{len(captured)} captured and {len(synthetic)} synthetic "
+          f"fixtures, {failures} mismatches")
+    if not captured:
+        print("No captured embeds: this run doesn't show the parser handles "
+              "real Mewbot payloads (see capture_embeds.py)")
+    for name, fn in (("legacy", legacy_parse), ("parser",
+                                                parse_pokemon_embed)):
+        print(f"{name:<8} {bench(fn, corpus, iterations):12,.0f} parses/s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
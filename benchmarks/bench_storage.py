@@ -0,0 +1,60 @@
+"""Bid-commit latency under each storage profile.
+
+Every profile gets a fresh database in a temporary directory. Bids are
+committed through AuctionRepository.record_bid while a reader keeps listing
+active auctions, the same mix /bid and /list produce in production.
+
+    python benchmarks/bench_storage.py [bids]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import (STORAGE_PROFILES, AuctionRepository,  # noqa: E402
+                      initialize_database)
+
+
+async def run_profile(profile, bids):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    initialize_database(path, profile)
+
+    repo = AuctionRepository(path, profile=profile)
+    auction_id = await repo.create_auction("1", 1, "url", None, 2**40, 1, 1,
+                                           1, "bench")
+    stop = asyncio.Event()
+
+    async def reader():
+        while not stop.is_set():
+            await repo.list_active_page(0)
+
+    reader_task = asyncio.create_task(reader())
+    latencies = []
+    for amount in range(1, bids + 1):
+        start = time.perf_counter()
+        await repo.record_bid(auction_id, amount % 50, amount,
+                              1704067200)
+        latencies.append(time.perf_counter() - start)
+
+    stop.set()
+    await reader_task
+    repo.close()
+
+    latencies.sort()
+    return (statistics.median(latencies) * 1000,
+            latencies[int(len(latencies) * 0.99) - 1] * 1000)
+
+
+async def main(bids):
+    print(f"{'profile':<10} {'p50 ms':>8} {'p99 ms':>8}")
+    for profile in STORAGE_PROFILES:
+        p50, p99 = await run_profile(profile, bids)
+        print(f"{profile:<10} {p50:8.3f} {p99:8.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
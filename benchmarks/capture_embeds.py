@@ -0,0 +1,80 @@
+"""Add real Mewbot /info embeds to the parser fixture corpus.
+
+Fetches the given messages over REST with a bot token and appends each one's
+first embed, as ``Embed.to_dict()``, to ``captured`` in
+fixtures/mewbot_embeds.json. The Global ID in the footer is replaced with a
+placeholder. ``expected`` is filled from what the parser reads today, for
+the same keys as the synthetic entries, and printed: check every value
+against the embed by hand before committing, since bench_parser holds the
+parser to it.
+
+    DISCORD_TOKEN=... python benchmarks/capture_embeds.py CHANNEL_ID \\
+        MESSAGE_ID [MESSAGE_ID ...]
+"""
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+
+from bench_parser import FIXTURES  # noqa: E402
+from pokemon_parser import GLOBAL_ID_RE, parse_pokemon_embed  # noqa: E402
+
+
+def scrub(payload, placeholder):
+    footer = payload.get("footer")
+    if footer and footer.get("text"):
+        footer["text"] = GLOBAL_ID_RE.sub(f"Global ID#: {placeholder}",
+                                          footer["text"])
+    return payload
+
+
+async def fetch_embeds(token, channel_id, message_ids):
+    client = discord.Client(intents=discord.Intents.none())
+    await client.login(token)
+    try:
+        channel = await client.fetch_channel(channel_id)
+        embeds = []
+        for message_id in message_ids:
+            message = await channel.fetch_message(message_id)
+            if not message.embeds:
+                print(f"Message {message_id} has no embed, skipped")
+                continue
+            embeds.append(message.embeds[0])
+        return embeds
+    finally:
+        await client.close()
+
+
+def main(channel_id=None, *message_ids):
+    token = os.environ.get("DISCORD_TOKEN")
+    if not token or not message_ids:
+        print(__doc__)
+        return 2
+
+    with open(FIXTURES, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    keys = list(fixtures["synthetic"][0]["expected"])
+
+    embeds = asyncio.run(
+        fetch_embeds(token, int(channel_id), [int(m) for m in message_ids]))
+    for embed in embeds:
+        parsed = parse_pokemon_embed(embed)
+        placeholder = len(fixtures["captured"]) + 1
+        entry = scrub(embed.to_dict(), placeholder)
+        entry["expected"] = {key: getattr(parsed, key) for key in keys}
+        fixtures["captured"].append(entry)
+        print(f"{embed.title}\n  "
+              f"{json.dumps(entry['expected'], ensure_ascii=False)}")
+
+    with open(FIXTURES, "w", encoding="utf-8") as f:
+        f.write(json.dumps(fixtures, indent=1, ensure_ascii=False))
+    print(f"Added {len(embeds)} captured embeds to {FIXTURES}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
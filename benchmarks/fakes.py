@@ -0,0 +1,251 @@
+"""In-memory stand-ins for the parts of discord.py that AuctionBot touches.
+
+Only the attributes and coroutines the cog actually uses are implemented.
+Every outbound "API call" can be given an artificial latency so benchmarks
+see realistic interleaving between concurrent commands.
+"""
+import asyncio
+import itertools
+import random
+import types
+
+_ids = itertools.count(10**17)
+
+
+def next_id():
+    return next(_ids)
+
+
+class FakeAPI:
+    """Shared settings and call counters for every fake object."""
+
+    def __init__(self, latency=0.0, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = {}
+
+    async def call(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        delay = self.latency + random.random() * self.jitter
+        await asyncio.sleep(delay)
+
+
+class FakeUser:
+
+    def __init__(self, api, user_id=None, dms_open=True):
+        self.api = api
+        self.id = user_id or next_id()
+        self.display_name = f"user{self.id % 10000}"
+        self.name = self.display_name
+        self.mention = f"<@{self.id}>"
+        self.dms_open = dms_open
+        self.dms = []
+
+    async def send(self, content=None, **kwargs):
+        await self.api.call("dm")
+        if not self.dms_open:
+            raise _forbidden()
+        self.dms.append(content)
+
+
+class FakeMessage:
+
+    def __init__(self, api, channel, content=None, embed=None):
+        self.api = api
+        self.id = next_id()
+        self.channel = channel
+        self.content = content
+        self.embeds = [embed] if embed else []
+
+    async def edit(self, embed=None, view=None, **kwargs):
+        await self.api.call("edit")
+        if embed is not None:
+            self.embeds = [embed]
+
+
+class FakeTextChannel:
+
+    def __init__(self, api, guild, name, category=None):
+        self.api = api
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.mention = f"<#{self.id}>"
+        self.messages = {}
+        self.text_channels = []
+
+    async def send(self, content=None, embed=None, **kwargs):
+        await self.api.call("send")
+        message = FakeMessage(self.api, self, content, embed)
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id):
+        await self.api.call("fetch_message")
+        try:
+            return self.messages[message_id]
+        except KeyError:
+            raise _not_found() from None
+
+    def get_partial_message(self, message_id):
+        return self.messages[message_id]
+
+    async def delete(self, reason=None):
+        await self.api.call("delete_channel")
+        self.guild._remove_channel(self)
+
+    async def edit(self, **kwargs):
+        await self.api.call("edit_channel")
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    async def purge(self, limit=None, **kwargs):
+        await self.api.call("purge")
+        deleted = list(self.messages.values())
+        self.messages.clear()
+        return deleted
+
+
+class FakeGuild:
+
+    def __init__(self, api, bot, guild_id=None):
+        self.api = api
+        self.bot = bot
+        self.id = guild_id or next_id()
+        self.channels = []
+        self.categories = []
+        self.default_role = object()
+        self.me = FakeUser(api, bot.user.id)
+        self.owner = FakeUser(api)
+
+    async def create_text_channel(self, name, category=None, **kwargs):
+        await self.api.call("create_channel")
+        channel = FakeTextChannel(self.api, self, name, category)
+        self.channels.append(channel)
+        if category is not None:
+            category.text_channels.append(channel)
+        self.bot._channels[channel.id] = channel
+        return channel
+
+    async def create_category(self, name, **kwargs):
+        await self.api.call("create_category")
+        category = FakeTextChannel(self.api, self, name)
+        self.categories.append(category)
+        self.channels.append(category)
+        self.bot._channels[category.id] = category
+        return category
+
+    def get_channel(self, channel_id):
+        return self.bot._channels.get(channel_id)
+
+    def _remove_channel(self, channel):
+        if channel in self.channels:
+            self.channels.remove(channel)
+        if channel.category and channel in channel.category.text_channels:
+            channel.category.text_channels.remove(channel)
+        self.bot._channels.pop(channel.id, None)
+
+
+class FakeBot:
+    """Enough of commands.Bot for the cog: channel/user lookup and the tree."""
+
+    def __init__(self, api=None):
+        self.api = api or FakeAPI()
+        self.user = types.SimpleNamespace(id=next_id())
+        self._channels = {}
+        self._users = {}
+        self.tree = types.SimpleNamespace(sync=self._sync)
+        self.guilds = []
+
+    async def _sync(self):
+        return []
+
+    def add_guild(self, guild_id=None):
+        guild = FakeGuild(self.api, self, guild_id)
+        self.guilds.append(guild)
+        return guild
+
+    def add_user(self, user_id=None, dms_open=True):
+        user = FakeUser(self.api, user_id, dms_open)
+        self._users[user.id] = user
+        return user
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def get_guild(self, guild_id):
+        for guild in self.guilds:
+            if guild.id == guild_id:
+                return guild
+        return None
+
+    def get_user(self, user_id):
+        return self._users.get(user_id)
+
+    async def fetch_user(self, user_id):
+        await self.api.call("fetch_user")
+        user = self._users.get(user_id)
+        if user is None:
+            raise _not_found()
+        return user
+
+    def is_owner(self, user):
+        return False
+
+    async def wait_until_ready(self):
+        return None
+
+
+class FakeInteraction:
+    """The slash-command side of a hybrid Context."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.user = ctx.author
+        self.response = types.SimpleNamespace(defer=self._defer,
+                                              edit_message=self._edit)
+        self.followup = types.SimpleNamespace(send=ctx.send)
+
+    async def _defer(self, **kwargs):
+        await self.ctx.bot.api.call("defer")
+
+    async def _edit(self, **kwargs):
+        await self.ctx.bot.api.call("edit")
+
+
+class FakeContext:
+    """A hybrid Context; replies go to ``sent``.
+
+    Prefix-style by default, pass ``slash=True`` to attach an interaction.
+    """
+
+    def __init__(self, bot, guild, author, channel=None, slash=False):
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.channel = channel
+        self.sent = []
+        self.interaction = FakeInteraction(self) if slash else None
+
+    async def send(self, content=None, embed=None, **kwargs):
+        await self.bot.api.call("send")
+        self.sent.append(content if content is not None else embed)
+        return FakeMessage(self.bot.api, self.channel, content, embed)
+
+
+class _FakeResponse:
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+
+def _forbidden():
+    import discord
+    return discord.Forbidden(_FakeResponse(403, "Forbidden"), "Cannot DM")
+
+
+def _not_found():
+    import discord
+    return discord.NotFound(_FakeResponse(404, "Not Found"), "Unknown")
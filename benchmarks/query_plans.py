@@ -0,0 +1,139 @@
+"""Check that every hot query is served by an index.
+
+Builds a fresh database with the current migrations, attaches an empty
+archive (``archive.py``) and runs EXPLAIN QUERY PLAN for each query below; any full table scan fails the check.
+
+    python benchmarks/query_plans.py
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import ARCHIVE_SCHEMA  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+HOT_QUERIES = {
+    "top bid":
+    ("SELECT leader_id, current_bid FROM auctions "
+     "WHERE auction_id = ? AND leader_id IS NOT NULL", (1, )),
+    "take lead":
+    ("UPDATE auctions SET current_bid = ?, leader_id = ?, "
+     "bid_count = bid_count + 1, last_bid_at = ? "
+     "WHERE auction_id = ? AND closed_at IS NULL "
+     "AND ifnull(current_bid, 0) < ?", (10, "1", 1704067200, 1, 10)),
+    "expired auctions":
+    ("SELECT auction_id FROM auctions WHERE end_time <= ? AND closed_at IS NULL",
+     (1704067200, )),
+    "active auctions":
+    ("SELECT a.auction_id, a.item_embed_url, a.end_time, a.current_bid, "
+     "a.pokemon_name FROM auctions a WHERE a.closed_at IS NULL "
+     "AND a.end_time >= ? AND (a.end_time > ? OR a.auction_id > ?) "
+     "ORDER BY a.end_time, a.auction_id LIMIT ?",
+     (1704067200, 1704067200, 1, 9)),
+    "active by price":
+    ("SELECT a.auction_id FROM auctions a WHERE a.closed_at IS NULL "
+     "AND a.end_time > ? AND ifnull(a.current_bid, 0) >= ? "
+     "AND (ifnull(a.current_bid, 0) > ? OR a.auction_id > ?) "
+     "ORDER BY ifnull(a.current_bid, 0), a.auction_id LIMIT ?",
+     (1704067200, 500, 500, 1, 9)),
+    "active filtered":
+    ("SELECT a.auction_id FROM auctions a "
+     "CROSS JOIN pokemon_attributes p ON p.auction_id = a.auction_id "
+     "WHERE a.closed_at IS NULL AND a.end_time >= ? "
+     "AND (a.end_time > ? OR a.auction_id > ?) "
+     "AND p.variant = ? AND p.iv_percent >= ? "
+     "ORDER BY a.end_time, a.auction_id LIMIT ?",
+     (1704067200, 1704067200, 1, "alpha", 80, 9)),
+    "price filtered":
+    ("SELECT a.auction_id FROM auctions a "
+     "CROSS JOIN pokemon_attributes p ON p.auction_id = a.auction_id "
+     "WHERE a.closed_at IS NULL AND a.end_time > ? "
+     "AND p.variant = ? AND p.iv_percent >= ? "
+     "ORDER BY ifnull(a.current_bid, 0), a.auction_id LIMIT ?",
+     (1704067200, "alpha", 80, 9)),
+    "sale attributes":
+    ("SELECT species, variant, iv_percent FROM pokemon_attributes "
+     "WHERE auction_id = ?", (1, )),
+    "expiry winners":
+    ("SELECT a.auction_id, a.leader_id, a.current_bid, p.title "
+     "FROM auctions a "
+     "LEFT JOIN pokemon_embeds p ON p.auction_id = a.auction_id "
+     "WHERE a.closed_at IS NULL AND a.end_time <= ?", (1704067200, )),
+    "price history":
+    ("SELECT sales, total, min_price, max_price, last_price, last_sold_at, "
+     "buckets FROM price_history WHERE species = ? AND iv_band >= ? "
+     "AND variant = ?", ("pikachu", 90, "radiant")),
+    "price history row":
+    ("SELECT buckets FROM price_history "
+     "WHERE species = ? AND variant = ? AND iv_band = ?",
+     ("pikachu", "radiant", 90)),
+    "search":
+    ("SELECT s.rowid, a.pokemon_name FROM pokemon_search s "
+     "JOIN auctions a ON a.auction_id = s.rowid "
+     "WHERE pokemon_search MATCH ? AND s.rowid < ? "
+     "ORDER BY s.rowid DESC LIMIT ?", ('"garchomp"', 2**63 - 1, 6)),
+    # The two pages are merged, sorting at most twice the page size
+    "archived search":
+    ("SELECT s.rowid, a.pokemon_name FROM archive.pokemon_search s "
+     "JOIN archive.auctions a ON a.auction_id = s.rowid "
+     "WHERE pokemon_search MATCH ? AND s.rowid < ? "
+     "ORDER BY s.rowid DESC LIMIT ?", ('"garchomp"', 2**63 - 1, 6)),
+    "archived auction": ("SELECT * FROM archive.auctions WHERE auction_id = ?",
+                         (1, )),
+    "archive batch":
+    ("SELECT auction_id FROM auctions WHERE closed_at < ? "
+     "ORDER BY closed_at LIMIT ?", (1704067200, 100)),
+    "archive copy":
+    ("INSERT OR REPLACE INTO archive.bids (bid_id, auction_id) "
+     "SELECT bid_id, auction_id FROM main.bids "
+     "WHERE auction_id IN (SELECT value FROM json_each(?))", ("[1]", )),
+    "archive delete":
+    ("DELETE FROM main.auction_events "
+     "WHERE auction_id IN (SELECT value FROM json_each(?))", ("[1]", )),
+    "expire auctioned":
+    ("DELETE FROM auctioned_pokemon WHERE last_auction_end < ?",
+     (1704067200, )),
+    "alpha variant": ("SELECT release_month, move FROM alphas WHERE name = ?",
+                      ("x", )),
+    "gleam variant": ("SELECT release_month FROM gleams WHERE name = ?",
+                      ("x", )),
+    "radiant variant": ("SELECT release_month FROM radiants WHERE name = ?",
+                        ("x", )),
+}
+
+
+def check(conn):
+    """Return a list of ``(name, plan)`` for queries that scan a table."""
+    failures = []
+    for name, (query, params) in HOT_QUERIES.items():
+        plan = [
+            row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}",
+                                           params)
+        ]
+        # "SCAN x USING INDEX" is an ordered index walk and "SCAN (subquery"
+        # reads rows a subquery already produced; any other SCAN is a table
+        if any(step.startswith("SCAN") and "INDEX" not in step
+               and not step.startswith("SCAN (subquery")
+               for step in plan) or any("TEMP B-TREE" in step
+                                        for step in plan):
+            failures.append((name, plan))
+        print(f"{name:<18} {' / '.join(plan)}")
+    return failures
+
+
+def main():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.execute("ATTACH DATABASE ':memory:' AS archive")
+    for statement in ARCHIVE_SCHEMA:
+        conn.execute(statement)
+    failures = check(conn)
+    for name, plan in failures:
+        print(f"FAIL {name}: {plan}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Fire thousands of concurrent /bid calls and check nothing was lost.
+
+The cog runs against a temporary database and the fake Discord layer, with
+random API latency so bid side effects interleave. Afterwards every auction
+must satisfy:
+
+* ``auctions.current_bid``, ``leader_id``, ``bid_count`` and ``last_bid_at``
+  match the highest, first-placed and number of rows in ``bids``,
+* accepted bids are strictly increasing in insertion order,
+* the cache agrees with the database on the current bid and leader,
+* replaying the event journal rebuilds the same current bid and leader.
+
+    python benchmarks/stress_bids.py [bids] [auctions]
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+
+from auction import AuctionBot  # noqa: E402
+from database import AuctionRepository, initialize_database  # noqa: E402
+from fakes import FakeAPI, FakeBot, FakeContext  # noqa: E402
+from metrics import METRICS  # noqa: E402
+from state import AuctionState  # noqa: E402
+
+
+async def open_auction(cog, guild, auctioneer, min_bid=1, interval=1,
+                       buyout=None, minutes=60):
+    """Create an auction row, its channel and message, bypassing /auction."""
+    channel = await guild.create_text_channel(f"auction-{len(guild.channels)}")
+    end_time = int(time.time()) + minutes * 60
+    auction_id = await cog.repo.create_auction(
+        str(random.getrandbits(48)), channel.id, "https://example/1/2/3",
+        buyout, end_time, auctioneer.id, min_bid, interval,
+        f"Pokemon {channel.id % 1000}")
+    embed = discord.Embed(title="Pokemon",
+                          description=(f"💰 **Min Bid:** {min_bid:,}\n"
+                                       f"🔼 **Interval:** {interval:,}\n"
+                                       f"🏷️ **Buyout:** *None*\n"
+                                       f"⏰ **Ends:** <t:{end_time}:f>"))
+    message = await channel.send(embed=embed)
+    await cog.repo.set_message_id(auction_id, message.id)
+    await cog.repo.save_pokemon_embed(auction_id, "Pokemon", "", "[]")
+    cog.auctions.put(
+        AuctionState(auction_id, channel.id, message.id, auctioneer.id, min_bid,
+                     interval, buyout, end_time))
+    cog.scheduler.schedule(auction_id, end_time)
+    return auction_id
+
+
+def verify(path, cog, auction_ids, replayed):
+    conn = sqlite3.connect(path)
+    errors = []
+    for auction_id in auction_ids:
+        current_bid, leader_id, bid_count, last_bid_at = conn.execute(
+            "SELECT current_bid, leader_id, bid_count, last_bid_at "
+            "FROM auctions WHERE auction_id = ?", (auction_id, )).fetchone()
+        bids = conn.execute(
+            "SELECT bid_amount, user_id, timestamp FROM bids "
+            "WHERE auction_id = ? ORDER BY bid_id", (auction_id, )).fetchall()
+        amounts = [bid[0] for bid in bids]
+        if amounts != sorted(set(amounts)):
+            errors.append(f"#{auction_id}: bids not strictly increasing")
+        if amounts and current_bid != amounts[-1]:
+            errors.append(
+                f"#{auction_id}: current_bid {current_bid} != top {amounts[-1]}")
+        top = bids[-1] if bids else (None, None, None)
+        if (leader_id, bid_count, last_bid_at) != (top[1], len(bids),
+                                                   top[2]):
+            errors.append(f"#{auction_id}: leader {leader_id}/{bid_count}/"
+                          f"{last_bid_at} != bids {top[1]}/{len(bids)}/"
+                          f"{top[2]}")
+        cached = cog.auctions.get(auction_id)
+        if cached and (cached.current_bid or None) != (current_bid or None):
+            errors.append(f"#{auction_id}: cache {cached.current_bid} "
+                          f"!= db {current_bid}")
+        if cached and str(cached.leader_id or "") != (leader_id or ""):
+            errors.append(f"#{auction_id}: cache leader {cached.leader_id} "
+                          f"!= db {leader_id}")
+        if cached:
+            state = replayed.get(auction_id) or {}
+            leader = str(cached.leader_id) if cached.leader_id else None
+            if ((state.get("current_bid") or 0, state.get("leader_id")) !=
+                (cached.current_bid or 0, leader)):
+                errors.append(f"#{auction_id}: journal replay {state} "
+                              f"!= cache {cached.current_bid}")
+    conn.close()
+    return errors
+
+
+async def main(bids=5000, auctions=20):
+    path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    initialize_database(path)
+
+    bot = FakeBot(FakeAPI(latency=0.001, jitter=0.004))
+    bot.repo = AuctionRepository(path)
+    cog = AuctionBot(bot)
+    await cog.cog_load()
+    guild = bot.add_guild()
+    auctioneer = bot.add_user()
+    bidders = [bot.add_user() for _ in range(200)]
+
+    auction_ids = [
+        await open_auction(cog, guild, auctioneer) for _ in range(auctions)
+    ]
+
+    async def one_bid():
+        ctx = FakeContext(bot, guild, random.choice(bidders))
+        await AuctionBot.place_bid.callback(cog, ctx,
+                                            random.choice(auction_ids),
+                                            random.randint(1, bids * 10))
+        return ctx.sent[-1] if ctx.sent else None
+
+    start = time.perf_counter()
+    replies = await asyncio.gather(*(one_bid() for _ in range(bids)))
+    elapsed = time.perf_counter() - start
+
+    accepted = sum(1 for reply in replies
+                   if isinstance(reply, str) and reply.startswith("✅"))
+    print(f"{bids} bids over {auctions} auctions in {elapsed:.2f}s "
+          f"({bids / elapsed:,.0f} bids/s), {accepted} accepted")
+    print(f"Discord calls: {bot.api.calls}")
+    await asyncio.sleep(cog.embeds.window)
+    updates = METRICS.counters("embed_updates_total")
+    print("Embeds: " + ", ".join(f"{count:,} {outcome}"
+                                 for outcome, count in sorted(updates.items())))
+
+    replayed = {
+        state["auction_id"]: state
+        for state in await bot.repo.load_open_auctions()
+    }
+    await cog.cog_unload()
+    bot.repo.close()
+    errors = verify(path, cog, auction_ids, replayed)
+    for error in errors:
+        print("FAIL", error)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    sys.exit(asyncio.run(main(*args)))
@@ -0,0 +1,263 @@
+import asyncio
+
+import discord
+
+# Channels the bot keeps one of per guild: kind -> (name, is_category)
+GUILD_CHANNELS = {
+    "logs": ("auction-logs", False),
+    "category": ("Auctions", True),
+}
+
+
+class GuildChannelResolver:
+    """Finds, or creates once, the bot's per-guild channels.
+
+    Resolved channel ids are cached in memory and persisted in the
+    ``guild_channels`` table, so a lookup is a dict hit plus
+    ``guild.get_channel`` instead of a scan over every channel by name.
+    Creation runs under a per-guild, per-kind lock, so concurrent closes
+    can't create duplicate log channels. Deleting one of the channels
+    (``on_guild_channel_delete``) drops it from the cache.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._ids = {}
+        self._locks = {}
+
+    async def load(self):
+        rows = await self.repo.list_guild_channels()
+        self._ids = {(int(row[0]), row[1]): int(row[2]) for row in rows}
+
+    async def logs_channel(self, guild):
+        return await self.get(guild, "logs")
+
+    async def auction_category(self, guild):
+        return await self.get(guild, "category")
+
+    async def get(self, guild, kind):
+        """The guild's channel of ``kind``, or None if it couldn't be made."""
+        channel = self._cached(guild, kind)
+        if channel is not None:
+            return channel
+
+        key = (guild.id, kind)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Someone else may have resolved it while we waited
+            channel = self._cached(guild, kind)
+            if channel is not None:
+                return channel
+
+            name, is_category = GUILD_CHANNELS[kind]
+            existing = guild.categories if is_category else guild.channels
+            channel = discord.utils.get(existing, name=name)
+            if channel is None:
+                try:
+                    if is_category:
+                        channel = await guild.create_category(name)
+                    else:
+                        channel = await guild.create_text_channel(name)
+                except Exception as e:
+                    print(f"Failed to create '{name}' channel: {e}")
+                    return None
+
+            self._ids[key] = channel.id
+            await self.repo.set_guild_channel(guild.id, kind, channel.id)
+            return channel
+
+    async def forget(self, channel):
+        """Drop a deleted channel so the next lookup resolves it again."""
+        guild_id = channel.guild.id
+        for kind in GUILD_CHANNELS:
+            if self._ids.get((guild_id, kind)) == channel.id:
+                del self._ids[(guild_id, kind)]
+                await self.repo.delete_guild_channel(guild_id, kind)
+
+    def _cached(self, guild, kind):
+        channel_id = self._ids.get((guild.id, kind))
+        if channel_id is None:
+            return None
+        return guild.get_channel(channel_id)
+
+
+class ChannelPool:
+    """Parks finished auction channels for reuse, per guild.
+
+    Creating a channel with its overwrites and deleting it again are among
+    the slowest, most rate-limited calls the bot makes. In guilds with a
+    pool size (``/auctionpool``), a closed auction's channel is hidden,
+    renamed and purged instead of deleted, and ``/auction`` takes a parked
+    channel with a single edit. A background task tops each pool up to its
+    size and trims it back down. Guilds without a pool create and delete
+    channels as before.
+    """
+
+    MAX_SIZE = 10
+    PARKED_NAME = "auction-parked"
+
+    def __init__(self, bot, repo, channels, interval=300, purge_limit=500):
+        self.bot = bot
+        self.repo = repo
+        self.channels = channels
+        self.interval = interval
+        # A channel with more history than this is deleted, not purged
+        self.purge_limit = purge_limit
+        self.sizes = {}
+        self._parked = {}
+        self._locks = {}
+        self._wake = asyncio.Event()
+        self._task = None
+        self.stats = {"reused": 0, "parked": 0, "created": 0, "deleted": 0}
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    async def load(self):
+        rows = await self.repo.list_channel_pool_sizes()
+        self.sizes = {int(guild_id): size for guild_id, size in rows}
+        self._parked = {}
+        for guild_id, channel_id in await self.repo.list_pooled_channels():
+            self._parked.setdefault(int(guild_id), []).append(int(channel_id))
+
+    def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._warm_loop())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def size(self, guild_id):
+        return self.sizes.get(int(guild_id), 0)
+
+    async def set_size(self, guild, size):
+        await self.repo.set_channel_pool_size(guild.id, size)
+        if size:
+            self.sizes[guild.id] = size
+        else:
+            self.sizes.pop(guild.id, None)
+        self._wake.set()
+
+    async def acquire(self, guild, name, topic, overwrites):
+        """A parked channel set up for a new auction, or None."""
+        parked = self._parked.get(guild.id)
+        while parked:
+            channel_id = parked.pop()
+            await self.repo.remove_pooled_channel(channel_id)
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            try:
+                await channel.edit(name=name,
+                                   topic=topic,
+                                   overwrites=overwrites)
+            except discord.HTTPException as e:
+                print(f"Failed to reuse channel {channel_id}: {e}")
+                continue
+            self.stats["reused"] += 1
+            self._wake.set()
+            return channel
+
+        if self.size(guild.id):
+            self._wake.set()
+        return None
+
+    async def release(self, channel, reason=None):
+        """Park a closed auction's channel, or delete it if there's no room."""
+        guild = channel.guild
+        parked = self._parked.setdefault(guild.id, [])
+        if len(parked) < self.size(guild.id):
+            try:
+                # Hidden first, so nobody posts while it's being purged
+                await channel.edit(name=self.PARKED_NAME,
+                                   topic=None,
+                                   overwrites=self._parked_overwrites(guild))
+                deleted = await channel.purge(limit=self.purge_limit)
+            except discord.NotFound:
+                raise
+            except discord.HTTPException as e:
+                print(f"Failed to park channel {channel.id}: {e}")
+            else:
+                if len(deleted) < self.purge_limit:
+                    parked.append(channel.id)
+                    await self.repo.add_pooled_channel(guild.id, channel.id)
+                    self.stats["parked"] += 1
+                    return
+
+        await channel.delete(reason=reason)
+        self.stats["deleted"] += 1
+
+    async def refill(self, guild):
+        """Create or delete parked channels until the pool matches its size."""
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            size = self.size(guild.id)
+            parked = self._parked.setdefault(guild.id, [])
+
+            # Channels deleted while the bot was offline
+            for channel_id in [
+                    channel_id for channel_id in parked
+                    if guild.get_channel(channel_id) is None
+            ]:
+                parked.remove(channel_id)
+                await self.repo.remove_pooled_channel(channel_id)
+
+            while len(parked) > size:
+                channel_id = parked.pop()
+                await self.repo.remove_pooled_channel(channel_id)
+                channel = guild.get_channel(channel_id)
+                if channel is not None:
+                    try:
+                        await channel.delete(reason="Auction pool shrunk.")
+                    except discord.NotFound:
+                        pass
+
+            if len(parked) >= size:
+                return
+            category = await self.channels.auction_category(guild)
+            while len(parked) < size:
+                channel = await guild.create_text_channel(
+                    self.PARKED_NAME,
+                    category=category,
+                    overwrites=self._parked_overwrites(guild))
+                parked.append(channel.id)
+                await self.repo.add_pooled_channel(guild.id, channel.id)
+                self.stats["created"] += 1
+
+    async def forget(self, channel):
+        parked = self._parked.get(channel.guild.id)
+        if parked and channel.id in parked:
+            parked.remove(channel.id)
+            await self.repo.remove_pooled_channel(channel.id)
+
+    def _parked_overwrites(self, guild):
+        return {
+            guild.default_role:
+            discord.PermissionOverwrite(view_channel=False),
+            guild.me:
+            discord.PermissionOverwrite(send_messages=True,
+                                        view_channel=True,
+                                        embed_links=True,
+                                        read_message_history=True)
+        }
+
+    async def _warm_loop(self):
+        await self.bot.wait_until_ready()
+        while True:
+            self._wake.clear()
+            for guild_id in set(self.sizes) | set(self._parked):
+                guild = self.bot.get_guild(guild_id)
+                if guild is None:
+                    continue
+                try:
+                    await self.refill(guild)
+                except Exception as e:
+                    print(f"Failed to refill channel pool for {guild_id}: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,896 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import archive
+import journal
+import prices
+from metrics import METRICS, query_label
+from migrations import migrate
+
+DB_PATH = 'auction_bot.db'
+
+# Pragmas applied to every connection the bot opens. "legacy" matches SQLite's
+# defaults (rollback journal, full fsync on every commit).
+STORAGE_PROFILES = {
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 30000,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -8000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -32000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+
+DEFAULT_PROFILE = os.getenv("AUCTION_DB_PROFILE", "balanced")
+
+
+def apply_storage_profile(conn, profile=DEFAULT_PROFILE, read_only=False):
+    """Apply a storage profile's pragmas to an open connection."""
+    pragmas = STORAGE_PROFILES[profile]
+    # busy_timeout first so the remaining pragmas wait out a busy writer
+    conn.execute(f"PRAGMA busy_timeout = {int(pragmas['busy_timeout'])}")
+    for name, value in pragmas.items():
+        if name == "busy_timeout":
+            continue
+        # The journal mode is stored in the file and needs write access
+        if name == "journal_mode" and read_only:
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def connect(path=DB_PATH, profile=DEFAULT_PROFILE, read_only=False, **kwargs):
+    """Open a connection to the auction database with a storage profile."""
+    if read_only:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, **kwargs)
+    else:
+        conn = sqlite3.connect(path, **kwargs)
+    apply_storage_profile(conn, profile, read_only=read_only)
+    return conn
+
+
+MAX_ROWID = 2**63 - 1
+
+
+def fts_query(text):
+    """Turn a /search query into an FTS5 MATCH expression, or None.
+
+    Words must all match, ``garch*`` matches a prefix and ``key:value``
+    matches the value within one word of the key, so ``hp:31`` finds an HP
+    stat line with 31 as its base or IV.
+    """
+    terms = []
+    for word in text.split():
+        key, _, value = word.partition(":")
+        if value and _has_token(key) and _has_token(value):
+            terms.append(f"NEAR({_phrase(key)} {_phrase(value)}, 1)")
+        elif word.endswith("*") and _has_token(word):
+            terms.append(f"{_phrase(word[:-1])}*")
+        elif _has_token(word):
+            terms.append(_phrase(word))
+    return " ".join(terms) or None
+
+
+def _has_token(word):
+    return any(char.isalnum() for char in word)
+
+
+def _phrase(word):
+    return '"' + word.replace('"', '""') + '"'
+
+# Columns /edit is allowed to change, keyed by the command option
+EDITABLE_COLUMNS = {
+    "minbid": "min_bid",
+    "interval": "interval",
+    "buyout": "buyout_price",
+    "time": "end_time",
+}
+
+# pokemon_attributes column prefix per parsed stat name
+STAT_COLUMNS = {
+    "HP": "hp",
+    "Attack": "atk",
+    "Defense": "def",
+    "Sp. Atk": "spatk",
+    "Sp. Def": "spdef",
+    "Speed": "spd",
+}
+
+# Sort orders for list_active_page: the key, with auction_id, of each order
+LIST_ORDERS = {
+    "ending": "a.end_time",
+    "price": "ifnull(a.current_bid, 0)",
+}
+
+
+def initialize_database(path=DB_PATH, profile=DEFAULT_PROFILE):
+    """Create or upgrade the database at ``path``, and its archive."""
+    conn = connect(path, profile)
+
+    # Let the archiver hand freed pages back. Takes effect at once on a new
+    # file; an existing one is rebuilt by VACUUM, once
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # INCREMENTAL
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+    # Upgrade the schema in place, keeping existing auctions and bids
+    migrate(conn)
+
+    # Closed auctions are moved here after a while (archive.py)
+    archive.create_archive(conn, archive.archive_path(path),
+                           STORAGE_PROFILES[profile]["journal_mode"])
+
+    conn.close()
+
+
+class AuctionRepository:
+    """Awaitable access to the auction database.
+
+    All writes go through a single dedicated writer thread so they are
+    serialized without blocking the event loop, while reads run on a small
+    pool of reader threads, each holding its own read-only connection.
+
+    Times (``end_time``, ``timestamp``, ``last_auction_end``) are integer
+    Unix seconds, both in the schema and in every method's arguments.
+
+    Every auction change is also appended to the ``auction_events`` journal
+    (see ``journal.py``) inside the same transaction.
+
+    Each connection has the archive database (see ``archive.py``) attached
+    as ``archive``; ``initialize_database`` creates it.
+    """
+
+    def __init__(self,
+                 path=DB_PATH,
+                 readers=2,
+                 profile=DEFAULT_PROFILE,
+                 archive_path=None):
+        self.path = path
+        self.profile = profile
+        self.archive_path = archive_path or archive.archive_path(path)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1,
+                                          thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers,
+                                           thread_name_prefix="db-reader")
+
+    # ------------------------------------------------------------------
+    # Plumbing
+    # ------------------------------------------------------------------
+
+    def _connection(self, read_only=False):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path,
+                           self.profile,
+                           read_only=read_only,
+                           timeout=30,
+                           check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            target = self.archive_path
+            if read_only:
+                target = f"file:{target}?mode=ro"
+            conn.execute("ATTACH DATABASE ? AS archive", (target, ))
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _run_read(self, fn, args, queued_at):
+        start = time.perf_counter()
+        METRICS.observe("db_queue_seconds", "read", start - queued_at)
+        try:
+            return fn(self._connection(read_only=True), *args)
+        finally:
+            METRICS.observe("db_query_seconds", _label(fn, args),
+                            time.perf_counter() - start)
+
+    def _run_write(self, fn, args, queued_at):
+        start = time.perf_counter()
+        METRICS.observe("db_queue_seconds", "write", start - queued_at)
+        conn = self._connection()
+        try:
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # Includes the commit, which is most of a write's cost
+            METRICS.observe("db_query_seconds", _label(fn, args),
+                            time.perf_counter() - start)
+
+    async def read(self, fn, *args):
+        """Run ``fn(conn, *args)`` on a reader thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._run_read, fn,
+                                          args, time.perf_counter())
+
+    async def write(self, fn, *args):
+        """Run ``fn(conn, *args)`` on the writer thread inside a transaction."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._run_write, fn,
+                                          args, time.perf_counter())
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    # ------------------------------------------------------------------
+    # Auctioneers
+    # ------------------------------------------------------------------
+
+    async def toggle_auctioneer(self, user_id):
+        """Add or remove an auctioneer, returning True if they were added."""
+        return await self.write(_toggle_auctioneer, str(user_id))
+
+    async def list_auctioneers(self):
+        return await self.read(_fetchall,
+                               "SELECT DISTINCT user_id FROM auctioneers")
+
+    async def list_allowed_guilds(self):
+        return await self.read(_fetchall, "SELECT guild_id FROM allowed_guilds")
+
+    async def toggle_allowed_guild(self, guild_id):
+        """Allow or disallow a guild, returning True if it was added."""
+        return await self.write(_toggle_allowed_guild, str(guild_id))
+
+    # ------------------------------------------------------------------
+    # Guild channels
+    # ------------------------------------------------------------------
+
+    async def list_guild_channels(self):
+        return await self.read(
+            _fetchall, "SELECT guild_id, kind, channel_id FROM guild_channels")
+
+    async def set_guild_channel(self, guild_id, kind, channel_id):
+        await self.write(
+            _execute, "INSERT OR REPLACE INTO guild_channels "
+            "(guild_id, kind, channel_id) VALUES (?, ?, ?)",
+            (str(guild_id), kind, str(channel_id)))
+
+    async def delete_guild_channel(self, guild_id, kind):
+        await self.write(
+            _execute,
+            "DELETE FROM guild_channels WHERE guild_id = ? AND kind = ?",
+            (str(guild_id), kind))
+
+    # ------------------------------------------------------------------
+    # Channel pool
+    # ------------------------------------------------------------------
+
+    async def list_channel_pool_sizes(self):
+        return await self.read(
+            _fetchall, "SELECT guild_id, channel_pool FROM guild_settings "
+            "WHERE channel_pool > 0")
+
+    async def set_channel_pool_size(self, guild_id, size):
+        await self.write(
+            _execute, "INSERT INTO guild_settings (guild_id, channel_pool) "
+            "VALUES (?, ?) ON CONFLICT(guild_id) "
+            "DO UPDATE SET channel_pool = excluded.channel_pool",
+            (str(guild_id), size))
+
+    async def list_pooled_channels(self):
+        return await self.read(
+            _fetchall, "SELECT guild_id, channel_id FROM pooled_channels")
+
+    async def add_pooled_channel(self, guild_id, channel_id):
+        await self.write(
+            _execute, "INSERT OR IGNORE INTO pooled_channels "
+            "(channel_id, guild_id) VALUES (?, ?)",
+            (str(channel_id), str(guild_id)))
+
+    async def remove_pooled_channel(self, channel_id):
+        await self.write(_execute,
+                         "DELETE FROM pooled_channels WHERE channel_id = ?",
+                         (str(channel_id), ))
+
+    # ------------------------------------------------------------------
+    # Auctions
+    # ------------------------------------------------------------------
+
+    async def get_auction(self, auction_id):
+        """The auction, from the live tables or else the archive."""
+        return await self.read(_get_auction, auction_id)
+
+    async def get_open_auction(self, auction_id):
+        return await self.read(
+            _fetchone,
+            "SELECT * FROM auctions WHERE auction_id = ? AND closed_at IS NULL",
+            (auction_id, ))
+
+    async def list_active_page(self,
+                               now,
+                               after=None,
+                               limit=9,
+                               sort="ending",
+                               variant=None,
+                               min_iv=None):
+        """One page of active auctions, soonest ending or cheapest first.
+
+        ``after`` is the sort key and ``auction_id`` of the last row of the
+        previous page (``(end_time, auction_id)`` or ``(current_bid,
+        auction_id)``). The page is a single range read on the open-auctions
+        index for that order, however deep it is. ``variant`` and ``min_iv``
+        filter on ``pokemon_attributes``.
+        """
+        key = LIST_ORDERS[sort]
+        conditions = ["a.closed_at IS NULL"]
+        params = []
+        if sort == "ending":
+            # end_time > now is the same bound as (now, <largest id>)
+            start = (now, MAX_ROWID)
+            if after is not None and tuple(after) > start:
+                start = tuple(after)
+        else:
+            conditions.append("a.end_time > ?")
+            params.append(now)
+            start = after
+        if start is not None:
+            # (key, auction_id) > (?, ?), spelled so the index on the
+            # ifnull() expression can seek to it as well
+            conditions.append(
+                f"{key} >= ? AND ({key} > ? OR a.auction_id > ?)")
+            params.extend((start[0], start[0], start[1]))
+
+        join = ""
+        if variant is not None or min_iv is not None:
+            # CROSS JOIN keeps the open-auctions index as the outer loop;
+            # pokemon_attributes also holds every closed auction
+            join = ("CROSS JOIN pokemon_attributes p "
+                    "ON p.auction_id = a.auction_id")
+            if variant is not None:
+                conditions.append("p.variant = ?")
+                params.append(prices.variant_key(variant))
+            if min_iv is not None:
+                conditions.append("p.iv_percent >= ?")
+                params.append(min_iv)
+
+        return await self.read(
+            _fetchall, f"""
+            SELECT a.auction_id, a.item_embed_url, a.end_time, a.current_bid,
+                   a.pokemon_name
+            FROM auctions a {join}
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {key}, a.auction_id LIMIT ?
+            """, (*params, limit))
+
+    async def get_expired_auctions(self, now):
+        """Ids of open auctions whose end time has passed."""
+        rows = await self.read(
+            _fetchall, "SELECT auction_id FROM auctions "
+            "WHERE end_time <= ? AND closed_at IS NULL", (now, ))
+        return [row[0] for row in rows]
+
+    async def close_expired(self, now):
+        """Close every auction that ended by ``now`` in one transaction.
+
+        Winners are the auctions' own ``leader_id`` and ``current_bid``.
+        Returns one row per closed auction with ``auction_id``,
+        ``channel_id``, ``end_time``, ``winner_id``, ``final_bid`` (both
+        NULL without bids) and the stored Pokémon embed columns.
+        """
+        return await self.write(_close_expired, now)
+
+    async def load_open_auctions(self):
+        """Every open auction as a dict of ``journal.STATE_FIELDS``.
+
+        Rebuilt from the latest journal snapshot plus the events after it,
+        then snapshotted again so the next start has nothing to replay.
+        """
+        return list((await self.write(_snapshot_journal)).values())
+
+    async def snapshot_journal(self):
+        """Store a journal snapshot if there are events since the last one."""
+        await self.write(_snapshot_journal)
+
+    async def create_auction(self,
+                             global_id,
+                             channel_id,
+                             embed_url,
+                             buyout_price,
+                             end_time,
+                             auctioneer_id,
+                             min_bid,
+                             interval,
+                             pokemon_name,
+                             pokemon=None):
+        """Insert a new auction and mark the Pokémon as auctioned.
+
+        ``pokemon``, the ``ParsedPokemon`` being auctioned, is stored in
+        ``pokemon_attributes`` for /list filters and the price history.
+        Returns the new auction id.
+        """
+        return await self.write(_create_auction, global_id, channel_id,
+                                embed_url, buyout_price, end_time,
+                                auctioneer_id, min_bid, interval, pokemon_name,
+                                pokemon)
+
+    async def set_message_id(self, auction_id, message_id):
+        await self.write(_update_auction, auction_id, "message_id",
+                         str(message_id))
+
+    async def update_auction(self, auction_id, option, value):
+        await self.write(_update_auction, auction_id,
+                         EDITABLE_COLUMNS[option], value)
+
+    async def close_auction(self, auction_id, winner_id, final_bid=None):
+        """Close an open auction, returning False if it was already closed.
+
+        A winner with a ``final_bid`` counts as a sale in the price history.
+        """
+        return await self.write(_close_auction, auction_id,
+                                None if winner_id is None else str(winner_id),
+                                final_bid, int(time.time()))
+
+    async def archive_closed(self, before, limit=100):
+        """Move up to ``limit`` auctions closed before ``before`` to the
+        archive, with their bids, embeds and events. Returns how many moved.
+        """
+        return await self.write(_archive_closed, before, limit)
+
+    async def expire_auctioned_pokemon(self, before):
+        """Forget Pokémon whose last auction ended before ``before``."""
+        return await self.write(
+            _execute,
+            "DELETE FROM auctioned_pokemon WHERE last_auction_end < ?",
+            (before, ))
+
+    async def incremental_vacuum(self, pages=None):
+        """Return up to ``pages`` free pages (all of them if None) to the
+        file system. Returns how many were freed.
+        """
+        return await self.write(_incremental_vacuum, pages)
+
+    async def get_last_auction_end(self, global_id):
+        row = await self.read(
+            _fetchone,
+            "SELECT last_auction_end FROM auctioned_pokemon WHERE global_id = ?",
+            (global_id, ))
+        return row[0] if row else None
+
+    # ------------------------------------------------------------------
+    # Bids
+    # ------------------------------------------------------------------
+
+    async def record_bid(self, auction_id, user_id, bid_amount, timestamp):
+        """Insert a bid and make it the auction's leading bid atomically.
+
+        ``timestamp`` is in Unix seconds. Returns False, recording nothing,
+        unless the auction is open and the bid beats its current bid.
+        """
+        return await self.write(_record_bid, auction_id, str(user_id),
+                                bid_amount, timestamp)
+
+    async def buyout(self, auction_id, user_id, bid_amount, timestamp):
+        """Record a buyout bid and close the auction in one transaction.
+
+        Returns False like ``record_bid``.
+        """
+        return await self.write(_buyout, auction_id, str(user_id),
+                                bid_amount, timestamp)
+
+    async def get_top_bid(self, auction_id):
+        """Return ``(user_id, bid_amount)`` for the leading bid, or None."""
+        return await self.read(
+            _fetchone, "SELECT leader_id, current_bid FROM auctions "
+            "WHERE auction_id = ? AND leader_id IS NOT NULL", (auction_id, ))
+
+    async def get_price_history(self, species, variant=None, min_iv=0):
+        """Merged ``prices.PriceSummary`` of one species' past sales.
+
+        ``variant`` None covers every variant. IV bands are whole, so
+        ``min_iv`` is rounded down to the start of its band.
+        """
+        query = ("SELECT sales, total, min_price, max_price, last_price, "
+                 "last_sold_at, buckets FROM price_history "
+                 "WHERE species = ? AND iv_band >= ?")
+        params = [prices.species_key(species), prices.iv_band(min_iv)]
+        if variant is not None:
+            query += " AND variant = ?"
+            params.append(prices.variant_key(variant))
+        return prices.PriceSummary(await self.read(_fetchall, query, params))
+
+    async def search_auctions(self, match, before=None, limit=6):
+        """Auctions whose stored embed matches ``match``, newest first.
+
+        ``match`` comes from ``fts_query``. ``before`` is the last auction id
+        of the previous page. Matches in ``excerpt`` are wrapped in \x02 and
+        \x03, since the stored text has markdown of its own. Archived
+        auctions are searched too.
+        """
+        page = """
+            SELECT * FROM (
+                SELECT s.rowid AS auction_id, a.pokemon_name, a.end_time,
+                       a.closed_at, a.current_bid, a.winner_id,
+                       snippet(pokemon_search, -1, char(2), char(3), '…', 8)
+                           AS excerpt
+                FROM {schema}.pokemon_search s
+                JOIN {schema}.auctions a ON a.auction_id = s.rowid
+                WHERE pokemon_search MATCH :match AND s.rowid < :before
+                ORDER BY s.rowid DESC LIMIT :limit
+            )"""
+        return await self.read(
+            _fetchall, f"""
+            {page.format(schema="main")}
+            UNION ALL
+            {page.format(schema="archive")}
+            ORDER BY auction_id DESC LIMIT :limit
+            """, {
+                "match": match,
+                "before": MAX_ROWID if before is None else before,
+                "limit": limit
+            })
+
+    async def list_outbid_opt_ins(self):
+        return await self.read(_fetchall, "SELECT user_id FROM outbid_notifs")
+
+    # ------------------------------------------------------------------
+    # Pokémon data
+    # ------------------------------------------------------------------
+
+    async def save_pokemon_embed(self, auction_id, title, description,
+                                 fields_json):
+        await self.write(
+            _execute,
+            "INSERT INTO pokemon_embeds (auction_id, title, description, fields) "
+            "VALUES (?, ?, ?, ?)", (auction_id, title, description, fields_json))
+
+    async def get_pokemon_embed(self, auction_id):
+        return await self.read(
+            _fetchone, "SELECT title, description, fields FROM pokemon_embeds "
+            "WHERE auction_id = ?", (auction_id, ))
+
+    async def get_variant_info(self, variant, name):
+        if variant == "alphas":
+            query = "SELECT release_month, move FROM alphas WHERE name = ?"
+        elif variant in ("gleams", "radiants"):
+            query = f"SELECT release_month FROM {variant} WHERE name = ?"
+        else:
+            return None
+        return await self.read(_fetchone, query, (name, ))
+
+
+def _label(fn, args):
+    """The statement for the generic helpers, else the helper's name."""
+    if fn in (_fetchone, _fetchall, _execute):
+        return query_label(args[0])
+    return fn.__name__.lstrip("_")
+
+
+def _fetchone(conn, query, params=()):
+    return conn.execute(query, params).fetchone()
+
+
+def _fetchall(conn, query, params=()):
+    return conn.execute(query, params).fetchall()
+
+
+def _execute(conn, query, params=()):
+    return conn.execute(query, params).rowcount
+
+
+def _get_auction(conn, auction_id):
+    for schema in ("main", "archive"):
+        row = conn.execute(
+            f"SELECT * FROM {schema}.auctions WHERE auction_id = ?",
+            (auction_id, )).fetchone()
+        if row is not None:
+            return row
+    return None
+
+
+def _is_auctioneer(conn, user_id):
+    return conn.execute("SELECT 1 FROM auctioneers WHERE user_id = ?",
+                        (user_id, )).fetchone() is not None
+
+
+def _toggle_auctioneer(conn, user_id):
+    if _is_auctioneer(conn, user_id):
+        conn.execute("DELETE FROM auctioneers WHERE user_id = ?", (user_id, ))
+        return False
+    conn.execute("INSERT INTO auctioneers (user_id) VALUES (?)", (user_id, ))
+    return True
+
+
+def _toggle_allowed_guild(conn, guild_id):
+    deleted = conn.execute("DELETE FROM allowed_guilds WHERE guild_id = ?",
+                           (guild_id, )).rowcount
+    if deleted:
+        return False
+    conn.execute("INSERT INTO allowed_guilds (guild_id) VALUES (?)",
+                 (guild_id, ))
+    return True
+
+
+def _journal(conn, auction_id, kind, created_at, user_id=None, amount=None,
+             data=None):
+    conn.execute(
+        "INSERT INTO auction_events "
+        "(auction_id, kind, user_id, amount, data, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (auction_id, kind, user_id, amount,
+         None if data is None else json.dumps(data), created_at))
+
+
+def _snapshot_journal(conn, keep=3):
+    """Fold the journal tail into a new snapshot; returns open auctions."""
+    # Nothing may append between reading the tail and storing the snapshot
+    conn.execute("BEGIN IMMEDIATE")
+    snapshot = conn.execute(
+        "SELECT event_id, state FROM auction_snapshots "
+        "ORDER BY snapshot_id DESC LIMIT 1").fetchone()
+    event_id, states = 0, {}
+    if snapshot is not None:
+        event_id, states = snapshot[0], journal.load_states(snapshot[1])
+
+    events = conn.execute(
+        "SELECT event_id, auction_id, kind, user_id, amount, data "
+        "FROM auction_events WHERE event_id > ? ORDER BY event_id",
+        (event_id, )).fetchall()
+    journal.replay(states, events)
+    if events:
+        conn.execute(
+            "INSERT INTO auction_snapshots (event_id, created_at, state) "
+            "VALUES (?, ?, ?)", (events[-1]["event_id"], int(
+                time.time()), journal.dump_states(states)))
+        conn.execute(
+            "DELETE FROM auction_snapshots WHERE snapshot_id NOT IN ("
+            "SELECT snapshot_id FROM auction_snapshots "
+            "ORDER BY snapshot_id DESC LIMIT ?)", (keep, ))
+    return states
+
+
+def _create_auction(conn, global_id, channel_id, embed_url, buyout_price,
+                    end_time, auctioneer_id, min_bid, interval, pokemon_name,
+                    pokemon):
+    cursor = conn.execute(
+        """
+        INSERT INTO auctions (
+            channel_id, message_id, item_embed_url, buyout_price, end_time,
+            auctioneer_id, min_bid, interval, current_bid, winner_id, pokemon_name
+        )
+        VALUES (?, NULL, ?, ?, ?, ?, ?, ?, NULL, NULL, ?)
+        """, (str(channel_id), embed_url, buyout_price, end_time,
+              str(auctioneer_id), min_bid, interval, pokemon_name))
+    auction_id = cursor.lastrowid
+    if pokemon is not None:
+        _insert_attributes(conn, auction_id, pokemon)
+    _journal(
+        conn, auction_id, journal.CREATED, int(time.time()),
+        str(auctioneer_id), data={
+            "channel_id": str(channel_id),
+            "auctioneer_id": str(auctioneer_id),
+            "min_bid": min_bid,
+            "interval": interval,
+            "buyout_price": buyout_price,
+            "end_time": end_time,
+            "global_id": global_id,
+            "pokemon_name": pokemon_name,
+        })
+
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO auctioned_pokemon (global_id, last_auction_end)
+        VALUES (?, ?)
+        """, (global_id, end_time))
+    return auction_id
+
+
+def _insert_attributes(conn, auction_id, pokemon):
+    values = {
+        "auction_id": auction_id,
+        "species": prices.species_key(pokemon.name),
+        "nickname": pokemon.nickname,
+        "gender": pokemon.gender,
+        "level": pokemon.level,
+        "variant": prices.variant_key(pokemon.variant),
+        "iv_percent": pokemon.iv_percent,
+        "hidden_power": pokemon.hidden_power,
+        "held_item": pokemon.held_item,
+    }
+    for stat, (base, iv, ev) in pokemon.stats.items():
+        prefix = STAT_COLUMNS[stat]
+        values[f"{prefix}_base"] = base
+        values[f"{prefix}_iv"] = iv
+        values[f"{prefix}_ev"] = ev
+    conn.execute(
+        f"INSERT INTO pokemon_attributes ({', '.join(values)}) "
+        f"VALUES ({', '.join('?' * len(values))})", tuple(values.values()))
+
+
+def _close_expired(conn, now):
+    # Nothing may close or bid on these between the read and the update
+    conn.execute("BEGIN IMMEDIATE")
+    rows = conn.execute(
+        """
+        SELECT a.auction_id, a.channel_id, a.end_time,
+               a.leader_id AS winner_id,
+               CASE WHEN a.leader_id IS NOT NULL THEN a.current_bid END
+                   AS final_bid,
+               p.title, p.description, p.fields
+        FROM auctions a
+        LEFT JOIN pokemon_embeds p ON p.auction_id = a.auction_id
+        WHERE a.closed_at IS NULL AND a.end_time <= ?
+        """, (now, )).fetchall()
+    conn.executemany(
+        "UPDATE auctions SET winner_id = ?, closed_at = ? WHERE auction_id = ?",
+        [(row["winner_id"], now, row["auction_id"]) for row in rows])
+    conn.executemany(
+        "INSERT INTO auction_events "
+        "(auction_id, kind, user_id, amount, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(row["auction_id"], journal.CLOSED, row["winner_id"],
+          row["final_bid"], now) for row in rows])
+    for row in rows:
+        if row["winner_id"] and row["final_bid"]:
+            _record_sale(conn, row["auction_id"], row["final_bid"], now)
+    return rows
+
+
+def _update_auction(conn, auction_id, column, value):
+    conn.execute(f"UPDATE auctions SET {column} = ? WHERE auction_id = ?",
+                 (value, auction_id))
+    _journal(conn, auction_id, journal.EDITED, int(time.time()),
+             data={column: value})
+
+
+def _close_auction(conn, auction_id, winner_id, final_bid, now):
+    closed = conn.execute(
+        "UPDATE auctions SET winner_id = ?, closed_at = ? "
+        "WHERE auction_id = ? AND closed_at IS NULL",
+        (winner_id, now, auction_id)).rowcount
+    if closed:
+        _journal(conn, auction_id, journal.CLOSED, now, winner_id, final_bid)
+        if winner_id and final_bid:
+            _record_sale(conn, auction_id, final_bid, now)
+    return bool(closed)
+
+
+def _record_sale(conn, auction_id, price, sold_at):
+    """Fold one sale into its price_history row."""
+    pokemon = conn.execute(
+        "SELECT species, variant, iv_percent FROM pokemon_attributes "
+        "WHERE auction_id = ?", (auction_id, )).fetchone()
+    if pokemon is None:
+        return
+    key = (pokemon["species"], pokemon["variant"],
+           prices.iv_band(pokemon["iv_percent"]))
+    row = conn.execute(
+        "SELECT buckets FROM price_history "
+        "WHERE species = ? AND variant = ? AND iv_band = ?", key).fetchone()
+    buckets = prices.add_sale(row["buckets"] if row else None, price)
+    conn.execute(
+        """
+        INSERT INTO price_history (
+            species, variant, iv_band, sales, total, min_price, max_price,
+            last_price, last_sold_at, buckets
+        )
+        VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (species, variant, iv_band) DO UPDATE SET
+            sales = sales + 1,
+            total = total + excluded.total,
+            min_price = MIN(min_price, excluded.min_price),
+            max_price = MAX(max_price, excluded.max_price),
+            last_price = CASE WHEN excluded.last_sold_at >= last_sold_at
+                         THEN excluded.last_price ELSE last_price END,
+            last_sold_at = MAX(last_sold_at, excluded.last_sold_at),
+            buckets = excluded.buckets
+        """, key + (price, price, price, price, sold_at, buckets))
+
+
+def _take_lead(conn, auction_id, user_id, bid_amount, timestamp):
+    """Make the bid the auction's leading bid, if it beats the current one."""
+    return conn.execute(
+        """
+        UPDATE auctions SET
+            current_bid = ?, leader_id = ?, bid_count = bid_count + 1,
+            last_bid_at = ?
+        WHERE auction_id = ? AND closed_at IS NULL
+              AND ifnull(current_bid, 0) < ?
+        """, (bid_amount, user_id, timestamp, auction_id,
+              bid_amount)).rowcount == 1
+
+
+def _record_bid(conn, auction_id, user_id, bid_amount, timestamp):
+    if not _take_lead(conn, auction_id, user_id, bid_amount, timestamp):
+        return False
+    conn.execute(
+        """
+        INSERT INTO bids (auction_id, user_id, bid_amount, timestamp)
+        VALUES (?, ?, ?, ?)
+        """, (auction_id, user_id, bid_amount, timestamp))
+    _journal(conn, auction_id, journal.BID, timestamp, user_id, bid_amount)
+    return True
+
+
+def _buyout(conn, auction_id, user_id, bid_amount, timestamp):
+    if not _take_lead(conn, auction_id, user_id, bid_amount, timestamp):
+        return False
+    conn.execute(
+        """
+        INSERT INTO bids (auction_id, user_id, bid_amount, timestamp)
+        VALUES (?, ?, ?, ?)
+        """, (auction_id, user_id, bid_amount, timestamp))
+    conn.execute(
+        "UPDATE auctions SET winner_id = ?, closed_at = ? WHERE auction_id = ?",
+        (user_id, timestamp, auction_id))
+    _journal(conn, auction_id, journal.BOUGHT_OUT, timestamp, user_id,
+             bid_amount)
+    _record_sale(conn, auction_id, bid_amount, timestamp)
+    return True
+
+
+def _archive_closed(conn, before, limit):
+    moved = [
+        row[0] for row in conn.execute(
+            "SELECT auction_id FROM auctions WHERE closed_at < ? "
+            "ORDER BY closed_at LIMIT ?", (before, limit))
+    ]
+    if not moved:
+        return 0
+    ids = json.dumps(moved)
+
+    where = "auction_id IN (SELECT value FROM json_each(?))"
+    for table in archive.ARCHIVED_TABLES:
+        # Only the archive's columns, in case the live table has grown more
+        columns = ", ".join(
+            row["name"]
+            for row in conn.execute(f"PRAGMA archive.table_info({table})"))
+        conn.execute(
+            f"INSERT OR REPLACE INTO archive.{table} ({columns}) "
+            f"SELECT {columns} FROM main.{table} WHERE {where}", (ids, ))
+    conn.execute(
+        "INSERT OR REPLACE INTO archive.pokemon_search (rowid, title, body) "
+        "SELECT rowid, title, body FROM main.pokemon_search "
+        "WHERE rowid IN (SELECT value FROM json_each(?))", (ids, ))
+    # In WAL mode each file commits on its own, so the copies are committed
+    # before the deletes; a crash in between leaves rows in both, which the
+    # next pass copies again and removes
+    conn.commit()
+
+    for table in reversed(archive.ARCHIVED_TABLES):
+        conn.execute(f"DELETE FROM main.{table} WHERE {where}", (ids, ))
+    return len(moved)
+
+
+def _incremental_vacuum(conn, pages):
+    before = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+    # execute() would step the pragma once, freeing a single page
+    conn.executescript("PRAGMA main.incremental_vacuum"
+                       + ("" if pages is None else f"({int(pages)})"))
+    return before - conn.execute("PRAGMA main.freelist_count").fetchone()[0]
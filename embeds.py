@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import discord
+
+from metrics import METRICS
+
+
+class EmbedUpdater:
+    """Coalesces edits to auction embeds.
+
+    The auction message and its embed are kept in memory after the first
+    lookup, so updates never re-fetch the message. Changes are applied to the
+    cached embed right away, but at most one ``message.edit`` per auction is
+    sent per ``window`` seconds and it always carries the latest state. A
+    bidding war therefore costs one REST call per window instead of two per
+    bid.
+
+    Every outcome is counted in ``METRICS`` as ``embed_updates_total``,
+    which ``/perfstats`` shows.
+    """
+
+    def __init__(self, bot, window=1.5):
+        self.bot = bot
+        self.window = window
+        self._messages = {}
+        self._embeds = {}
+        self._locks = {}
+        self._pending = {}
+        self._last_publish = {}
+
+    def register(self, auction_id, message, embed):
+        """Remember a freshly sent auction message so it's never fetched."""
+        self._messages[auction_id] = message
+        self._embeds[auction_id] = embed
+
+    async def load(self, auction_id, channel_id, message_id):
+        """Return the cached embed, fetching the message the first time.
+
+        Raises whatever ``fetch_message`` raises, or LookupError if the
+        message has no embed.
+        """
+        embed = self._embeds.get(auction_id)
+        if embed is not None:
+            return embed
+
+        lock = self._locks.setdefault(auction_id, asyncio.Lock())
+        async with lock:
+            embed = self._embeds.get(auction_id)
+            if embed is not None:
+                return embed
+
+            channel = self.bot.get_channel(int(channel_id))
+            if channel is None:
+                raise LookupError(f"channel {channel_id} not found")
+            message = await channel.fetch_message(int(message_id))
+            METRICS.increment("embed_updates_total", "fetched")
+            if not message.embeds:
+                raise LookupError("auction embed not found")
+            self.register(auction_id, message, message.embeds[0])
+            return message.embeds[0]
+
+    async def update(self, auction_id, channel_id, message_id, mutate):
+        """Apply ``mutate(embed)`` now and publish it within the window."""
+        embed = await self.load(auction_id, channel_id, message_id)
+        mutate(embed)
+        METRICS.increment("embed_updates_total", "requested")
+
+        if auction_id in self._pending:
+            # Rides along with the edit that's already scheduled
+            METRICS.increment("embed_updates_total", "saved")
+        else:
+            ready_at = self._last_publish.get(auction_id, 0) + self.window
+            delay = max(0, ready_at - time.monotonic())
+            self._pending[auction_id] = asyncio.create_task(
+                self._publish_after(auction_id, delay))
+
+    def forget(self, auction_id):
+        """Drop everything held for an auction, e.g. once it has closed."""
+        task = self._pending.pop(auction_id, None)
+        if task:
+            task.cancel()
+        self._messages.pop(auction_id, None)
+        self._embeds.pop(auction_id, None)
+        self._locks.pop(auction_id, None)
+        self._last_publish.pop(auction_id, None)
+
+    def close(self):
+        for auction_id in list(self._pending):
+            self.forget(auction_id)
+
+    async def _publish_after(self, auction_id, delay):
+        await asyncio.sleep(delay)
+        # Updates from here on schedule the next edit, one window later
+        self._pending.pop(auction_id, None)
+        self._last_publish[auction_id] = time.monotonic()
+
+        message = self._messages.get(auction_id)
+        embed = self._embeds.get(auction_id)
+        if message is None or embed is None:
+            return
+
+        try:
+            await message.edit(embed=embed)
+            METRICS.increment("embed_updates_total", "published")
+        except discord.HTTPException as e:
+            if e.status == 429 and auction_id not in self._pending:
+                # Rate limited: keep the latest state and retry once it lifts
+                METRICS.increment("embed_updates_total", "rate_limited")
+                retry_after = getattr(e, "retry_after", None) or self.window
+                self._pending[auction_id] = asyncio.create_task(
+                    self._publish_after(auction_id, retry_after))
+                return
+            METRICS.increment("embed_updates_total", "failed")
+            print(f"Failed to update embed for auction {auction_id}: {e}")
+            if isinstance(e, discord.NotFound):
+                self.forget(auction_id)
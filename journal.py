@@ -0,0 +1,92 @@
+"""The append-only auction event journal.
+
+Every change to an auction is appended to ``auction_events`` in the same
+transaction as the change itself, so the journal and the ``auctions`` and
+``bids`` tables can never disagree. ``replay`` folds events into the state
+of the open auctions. ``auction_snapshots`` stores that state now and then,
+together with the last event it includes, so a restart reads one snapshot
+and replays only the events after it.
+"""
+import asyncio
+import json
+
+CREATED = "created"
+BID = "bid"
+EDITED = "edited"
+CLOSED = "closed"
+BOUGHT_OUT = "bought_out"
+
+# Everything a snapshot keeps per open auction, the fields of AuctionState
+STATE_FIELDS = ("auction_id", "channel_id", "message_id", "auctioneer_id",
+                "min_bid", "interval", "buyout_price", "end_time",
+                "current_bid", "leader_id")
+
+
+def replay(states, events):
+    """Apply ``events`` in order to ``states``, ``{auction_id: dict}``.
+
+    Only open auctions are kept; closed and bought out ones are dropped.
+    """
+    for event in events:
+        auction_id = event["auction_id"]
+        kind = event["kind"]
+        if kind == CREATED:
+            state = states[auction_id] = dict.fromkeys(STATE_FIELDS)
+            _update(state, event["data"])
+            state["auction_id"] = auction_id
+        elif kind in (CLOSED, BOUGHT_OUT):
+            states.pop(auction_id, None)
+        elif auction_id in states:
+            state = states[auction_id]
+            if kind == BID:
+                state["current_bid"] = event["amount"]
+                state["leader_id"] = event["user_id"]
+            elif kind == EDITED:
+                _update(state, event["data"])
+    return states
+
+
+def _update(state, data):
+    # Events carry extra detail for the audit trail, keep only the state
+    for key, value in json.loads(data).items():
+        if key in STATE_FIELDS:
+            state[key] = value
+
+
+def dump_states(states):
+    return json.dumps(list(states.values()))
+
+
+def load_states(text):
+    return {state["auction_id"]: state for state in json.loads(text)}
+
+
+class JournalSnapshots:
+    """Snapshots the journal every ``interval`` seconds in the background."""
+
+    def __init__(self, repo, interval=300):
+        self.repo = repo
+        self.interval = interval
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.repo.snapshot_journal()
+            except Exception as e:
+                print(f"Failed to snapshot the auction journal: {e}")
@@ -0,0 +1,313 @@
+"""In-process performance metrics.
+
+``METRICS`` is shared by the whole bot. It holds fixed-bucket latency
+histograms and counters, each keyed by a family and one label, e.g.
+``command_seconds{command="bid"}``. Recording is a lock and a few integer
+updates, so it stays on in production; the repository records from its
+worker threads.
+
+The owner-only ``/perfstats`` command summarises the histograms, and
+``MetricsExporter`` can publish them in the Prometheus text format to a file
+(``AUCTION_METRICS_FILE``) or a local port (``AUCTION_METRICS_PORT``).
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, 0.1ms to 10s
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# family -> (label name, help text)
+FAMILIES = {
+    "command_seconds": ("command", "Hybrid command latency."),
+    "db_query_seconds": ("query",
+                         "SQL statement time on the database thread."),
+    "db_queue_seconds": ("pool", "Wait for a free database thread."),
+    "discord_request_seconds": ("call", "Discord REST call latency."),
+    "discord_errors_total": ("call", "Discord REST calls that raised."),
+    "check_auctions_seconds": (None, "Duration of one expiry pass."),
+    "embed_updates_total": ("outcome",
+                            "Auction embed updates: requested, published, "
+                            "saved (folded into a later edit), fetched, "
+                            "failed and rate_limited."),
+    "outbid_notices_total": ("outcome",
+                             "Outbid notices: recorded, sent as a DM, sent "
+                             "as a channel mention (fallback) and dropped "
+                             "on a full queue."),
+}
+
+# Discord REST routes by their template, for readable call names
+DISCORD_CALLS = {
+    ("GET", "/channels/{channel_id}/messages/{message_id}"): "fetch_message",
+    ("PATCH", "/channels/{channel_id}/messages/{message_id}"): "edit_message",
+    ("POST", "/channels/{channel_id}/messages"): "send_message",
+    ("POST", "/guilds/{guild_id}/channels"): "create_channel",
+    ("PATCH", "/channels/{channel_id}"): "edit_channel",
+    ("DELETE", "/channels/{channel_id}"): "delete_channel",
+    ("POST", "/users/@me/channels"): "open_dm",
+    ("GET", "/users/{user_id}"): "fetch_user",
+}
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+
+    def __init__(self, namespace="auction"):
+        self.namespace = namespace
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, family, label, seconds):
+        with self._lock:
+            histogram = self._histograms.get((family, label))
+            if histogram is None:
+                histogram = self._histograms[(family, label)] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, family, label, amount=1):
+        with self._lock:
+            key = (family, label)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, family, label=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(family, label, time.perf_counter() - start)
+
+    def histograms(self, family):
+        """``{label: Histogram}`` for one family."""
+        with self._lock:
+            return {
+                label: histogram
+                for (name, label), histogram in self._histograms.items()
+                if name == family
+            }
+
+    def counters(self, family):
+        with self._lock:
+            return {
+                label: value
+                for (name, label), value in self._counters.items()
+                if name == family
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items(),
+                                key=lambda item: (item[0][0], item[0][1] or ""))
+            counters = sorted(self._counters.items(),
+                              key=lambda item: (item[0][0], item[0][1] or ""))
+            # Copy under the lock, histograms keep changing
+            histograms = [(key, list(h.counts), h.count, h.sum)
+                          for key, h in histograms]
+
+        lines = []
+        declared = set()
+        for (family, label), counts, count, total in histograms:
+            name = f"{self.namespace}_{family}"
+            if family not in declared:
+                declared.add(family)
+                lines.append(f"# HELP {name} {FAMILIES[family][1]}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + ("+Inf", ), counts):
+                cumulative += bucket
+                labels = _labels(family, label, le=bound)
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(family, label)} {total!r}")
+            lines.append(f"{name}_count{_labels(family, label)} {count}")
+
+        for (family, label), value in counters:
+            name = f"{self.namespace}_{family}"
+            if family not in declared:
+                declared.add(family)
+                lines.append(f"# HELP {name} {FAMILIES[family][1]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(family, label)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(family, label, le=None):
+    pairs = []
+    label_name = FAMILIES[family][0]
+    if label_name and label is not None:
+        pairs.append((label_name, label))
+    if le is not None:
+        pairs.append(("le", le))
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value):
+    return (str(value).replace("\\", "\\\\").replace('"', '\\"').replace(
+        "\n", "\\n"))
+
+
+def query_label(query):
+    """A SQL statement collapsed onto one line, as a metric label."""
+    query = " ".join(query.split())
+    return query if len(query) <= 120 else query[:117] + "..."
+
+
+METRICS = Metrics()
+
+
+def instrument_http(bot, metrics=METRICS):
+    """Time every Discord REST call the bot makes.
+
+    Wraps ``bot.http.request``, the single funnel for REST traffic, so
+    sends, edits, fetches and channel changes are all covered. Does nothing
+    for bots without an HTTP client.
+    """
+    http = getattr(bot, "http", None)
+    if http is None or getattr(http.request, "_instrumented", False):
+        return
+    request = http.request
+
+    async def timed_request(route, **kwargs):
+        call = DISCORD_CALLS.get((route.method, route.path),
+                                 f"{route.method} {route.path}")
+        start = time.perf_counter()
+        try:
+            return await request(route, **kwargs)
+        except Exception:
+            metrics.increment("discord_errors_total", call)
+            raise
+        finally:
+            metrics.observe("discord_request_seconds", call,
+                            time.perf_counter() - start)
+
+    timed_request._instrumented = True
+    http.request = timed_request
+
+
+class MetricsExporter:
+    """Publishes ``METRICS`` in the Prometheus text format.
+
+    With ``path`` the file is rewritten atomically every ``interval``
+    seconds; with ``port`` a minimal HTTP endpoint answers every request
+    with the current metrics. Both are off unless configured.
+    """
+
+    def __init__(self,
+                 metrics=METRICS,
+                 path=None,
+                 port=None,
+                 host="127.0.0.1",
+                 interval=15):
+        self.metrics = metrics
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self._task = None
+        self._server = None
+
+    @classmethod
+    def from_env(cls, metrics=METRICS):
+        port = os.getenv("AUCTION_METRICS_PORT")
+        return cls(metrics,
+                   path=os.getenv("AUCTION_METRICS_FILE") or None,
+                   port=int(port) if port else None)
+
+    @property
+    def enabled(self):
+        return bool(self.path or self.port)
+
+    @property
+    def running(self):
+        return self._task is not None or self._server is not None
+
+    async def start(self):
+        if self.running:
+            return
+        if self.path:
+            self._task = asyncio.create_task(self._write_loop())
+        if self.port:
+            self._server = await asyncio.start_server(self._serve, self.host,
+                                                      self.port)
+            print(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._server:
+            self._server.close()
+            self._server = None
+
+    def write(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write(self.metrics.render())
+        os.replace(tmp_path, self.path)
+
+    async def _write_loop(self):
+        while True:
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Failed to write metrics to {self.path}: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _serve(self, reader, writer):
+        try:
+            # Whatever the path, the answer is the metrics page
+            await reader.readuntil(b"\r\n\r\n")
+            body = self.metrics.render().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Content-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() +
+                         b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,460 @@
+"""Versioned schema migrations for auction_bot.db.
+
+The schema version lives in ``PRAGMA user_version``. Each migration runs in
+its own transaction and bumps the version, so upgrading an existing database
+keeps all of its data. Steps are either SQL strings or callables taking the
+connection, for migrations that need to rewrite rows.
+"""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from journal import STATE_FIELDS, dump_states
+
+# Timestamps written before migration 4 without an offset were Asia/Kolkata
+LEGACY_TIMEZONE = timezone(timedelta(hours=5, minutes=30))
+
+# UPDATE ... FROM (migration 13) needs SQLite 3.33
+MIN_SQLITE_VERSION = (3, 33, 0)
+
+
+def to_epoch(value):
+    """Convert a stored timestamp (ISO text or a number) to Unix seconds."""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return int(float(text))
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=LEGACY_TIMEZONE)
+    return int(moment.timestamp())
+
+
+def _rebuild(conn, table, create, columns, converted):
+    """Recreate ``table`` from ``create`` and copy its rows over.
+
+    Columns in ``converted`` go through ``to_epoch``. SQLite can only change
+    a column's type affinity by rebuilding the table.
+    """
+    conn.create_function("to_epoch", 1, to_epoch, deterministic=True)
+    select = ", ".join(f"to_epoch({column})" if column in converted else column
+                       for column in columns)
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?",
+                            (table, )).fetchone()
+
+    conn.execute(create.replace(f"TABLE {table} ", f"TABLE {table}_new ", 1))
+    conn.execute(f"INSERT INTO {table}_new ({', '.join(columns)}) "
+                 f"SELECT {select} FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+    # Keep AUTOINCREMENT from reusing ids of rows deleted before the rebuild
+    if sequence is not None:
+        updated = conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+            (sequence[0], table)).rowcount
+        if not updated:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+                         (table, sequence[0]))
+
+
+def _epoch_timestamps(conn):
+    _rebuild(
+        conn, "auctions", """
+        CREATE TABLE auctions (
+            auction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id TEXT,
+            message_id TEXT,
+            item_embed_url TEXT,
+            buyout_price INTEGER,
+            end_time INTEGER,
+            auctioneer_id TEXT,
+            min_bid INTEGER,
+            interval INTEGER,
+            current_bid INTEGER DEFAULT 0,
+            winner_id TEXT,
+            pokemon_name TEXT
+        )
+        """, ("auction_id", "channel_id", "message_id", "item_embed_url",
+              "buyout_price", "end_time", "auctioneer_id", "min_bid",
+              "interval", "current_bid", "winner_id", "pokemon_name"),
+        {"end_time"})
+    _rebuild(
+        conn, "bids", """
+        CREATE TABLE bids (
+            bid_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            auction_id INTEGER,
+            user_id TEXT,
+            bid_amount INTEGER,
+            timestamp INTEGER,
+            FOREIGN KEY (auction_id) REFERENCES auctions(auction_id)
+        )
+        """, ("bid_id", "auction_id", "user_id", "bid_amount", "timestamp"),
+        {"timestamp"})
+    _rebuild(
+        conn, "auctioned_pokemon", """
+        CREATE TABLE auctioned_pokemon (
+            global_id TEXT PRIMARY KEY,
+            last_auction_end INTEGER
+        )
+        """, ("global_id", "last_auction_end"), {"last_auction_end"})
+
+
+def _seed_journal_snapshot(conn):
+    """Snapshot the auctions that are open before the journal starts."""
+    rows = conn.execute("""
+        SELECT a.auction_id, a.channel_id, a.message_id, a.auctioneer_id,
+               a.min_bid, a.interval, a.buyout_price, a.end_time,
+               a.current_bid, (
+                   SELECT b.user_id FROM bids b
+                   WHERE b.auction_id = a.auction_id
+                   ORDER BY b.timestamp DESC, b.bid_id DESC LIMIT 1
+               )
+        FROM auctions a
+        WHERE a.closed_at IS NULL
+        """).fetchall()
+    states = {row[0]: dict(zip(STATE_FIELDS, row)) for row in rows}
+    conn.execute(
+        "INSERT INTO auction_snapshots (event_id, created_at, state) "
+        "VALUES (0, CAST(strftime('%s', 'now') AS INTEGER), ?)",
+        (dump_states(states), ))
+
+
+def _typed_attributes(conn):
+    """Add the rest of ParsedPokemon to migration 9's pokemon_attributes."""
+    columns = [
+        "nickname TEXT", "gender TEXT", "level INTEGER", "hidden_power TEXT",
+        "held_item TEXT"
+    ]
+    for stat in ("hp", "atk", "def", "spatk", "spdef", "spd"):
+        columns += [f"{stat}_{part} INTEGER" for part in ("base", "iv", "ev")]
+    for column in columns:
+        conn.execute(f"ALTER TABLE pokemon_attributes ADD COLUMN {column}")
+
+
+def _search_body(row=""):
+    """SQL for the text indexed for a pokemon_embeds row.
+
+    The description plus every field's name and value; ``row`` is ``new.``
+    inside triggers.
+    """
+    return f"""
+        COALESCE({row}description, '') || ' ' ||
+        CASE WHEN json_valid({row}fields) THEN COALESCE((
+            SELECT group_concat(json_extract(value, '$.name') || ' ' ||
+                                json_extract(value, '$.value'), ' ')
+            FROM json_each({row}fields)), '')
+        ELSE '' END
+    """
+
+
+MIGRATIONS = [
+    (1, "baseline schema", [
+        """
+        CREATE TABLE IF NOT EXISTS auctioneers (
+            user_id TEXT PRIMARY KEY
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS auctions (
+            auction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id TEXT,
+            message_id TEXT,
+            item_embed_url TEXT,
+            buyout_price INTEGER,
+            end_time TEXT,
+            auctioneer_id TEXT,
+            min_bid INTEGER,
+            interval INTEGER,
+            current_bid INTEGER DEFAULT 0,
+            winner_id TEXT,
+            pokemon_name TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS bids (
+            bid_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            auction_id INTEGER,
+            user_id TEXT,
+            bid_amount INTEGER,
+            timestamp TEXT,
+            FOREIGN KEY (auction_id) REFERENCES auctions(auction_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pokemon_embeds (
+            auction_id INTEGER PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            fields TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS auctioned_pokemon (
+            global_id TEXT PRIMARY KEY,
+            last_auction_end TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS outbid_notifs (
+            user_id TEXT PRIMARY KEY
+        )
+        """,
+        # Variant tables
+        "CREATE TABLE IF NOT EXISTS gleams (name TEXT, release_month TEXT)",
+        "CREATE TABLE IF NOT EXISTS radiants (name TEXT, release_month TEXT)",
+        "CREATE TABLE IF NOT EXISTS alphas (name TEXT, release_month TEXT, move TEXT)",
+        # Left over from older builds, never read
+        "DROP TABLE IF EXISTS outbid_notifications",
+    ]),
+    (2, "indexes for hot queries", [
+        # Highest bid per auction (winner lookups, MAX / ORDER BY bid_amount)
+        "CREATE INDEX IF NOT EXISTS idx_bids_auction_amount "
+        "ON bids(auction_id, bid_amount)",
+        # Latest bidder per auction (outbid notifications)
+        "CREATE INDEX IF NOT EXISTS idx_bids_auction_time "
+        "ON bids(auction_id, timestamp)",
+        # Open auctions by deadline (/list and the expiry check)
+        "CREATE INDEX IF NOT EXISTS idx_auctions_open_end "
+        "ON auctions(end_time) WHERE winner_id IS NULL",
+        "CREATE INDEX IF NOT EXISTS idx_gleams_name ON gleams(name)",
+        "CREATE INDEX IF NOT EXISTS idx_radiants_name ON radiants(name)",
+        "CREATE INDEX IF NOT EXISTS idx_alphas_name ON alphas(name)",
+    ]),
+    (3, "guild allowlist", [
+        """
+        CREATE TABLE IF NOT EXISTS allowed_guilds (
+            guild_id TEXT PRIMARY KEY
+        )
+        """,
+        # The guilds that used to be hardcoded in cog_check
+        "INSERT OR IGNORE INTO allowed_guilds (guild_id) VALUES "
+        "('998128574898896906'), ('1188747974378008626'), "
+        "('1307241112716709898')",
+    ]),
+    (4, "integer epoch timestamps", [
+        # Rebuilds auctions, bids and auctioned_pokemon with INTEGER time
+        # columns; dropping the tables dropped their indexes too
+        _epoch_timestamps,
+        "CREATE INDEX IF NOT EXISTS idx_bids_auction_amount "
+        "ON bids(auction_id, bid_amount)",
+        "CREATE INDEX IF NOT EXISTS idx_bids_auction_time "
+        "ON bids(auction_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_auctions_open_end "
+        "ON auctions(end_time) WHERE winner_id IS NULL",
+    ]),
+    (5, "closed_at marks finished auctions", [
+        # Auctions that ended without bids kept winner_id NULL and looked open
+        "ALTER TABLE auctions ADD COLUMN closed_at INTEGER",
+        "UPDATE auctions SET closed_at = end_time WHERE winner_id IS NOT NULL",
+        "DROP INDEX IF EXISTS idx_auctions_open_end",
+        "CREATE INDEX idx_auctions_open_end "
+        "ON auctions(end_time) WHERE closed_at IS NULL",
+        # Serves the archive's per-auction bid moves, and is descending so
+        # the leader backfill in migration 13 ranks bids in index order
+        "DROP INDEX IF EXISTS idx_bids_auction_amount",
+        "CREATE INDEX idx_bids_auction_amount "
+        "ON bids(auction_id, bid_amount DESC)",
+    ]),
+    (6, "per-guild channel ids", [
+        """
+        CREATE TABLE IF NOT EXISTS guild_channels (
+            guild_id TEXT,
+            kind TEXT,
+            channel_id TEXT,
+            PRIMARY KEY (guild_id, kind)
+        )
+        """,
+    ]),
+    (7, "auction channel pool", [
+        """
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id TEXT PRIMARY KEY,
+            channel_pool INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pooled_channels (
+            channel_id TEXT PRIMARY KEY,
+            guild_id TEXT NOT NULL
+        )
+        """,
+    ]),
+    (8, "auction event journal", [
+        """
+        CREATE TABLE IF NOT EXISTS auction_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            auction_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            user_id TEXT,
+            amount INTEGER,
+            data TEXT,
+            created_at INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_auction_events_auction "
+        "ON auction_events(auction_id, event_id)",
+        """
+        CREATE TABLE IF NOT EXISTS auction_snapshots (
+            snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            state TEXT NOT NULL
+        )
+        """,
+        _seed_journal_snapshot,
+    ]),
+    (9, "price history rollups", [
+        # What each auction sells, for its price_history row. Older auctions
+        # only kept a display name, so they have no row and stay out of the
+        # rollups
+        """
+        CREATE TABLE IF NOT EXISTS pokemon_attributes (
+            auction_id INTEGER PRIMARY KEY,
+            species TEXT NOT NULL,
+            variant TEXT NOT NULL,
+            iv_percent REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS price_history (
+            species TEXT NOT NULL,
+            variant TEXT NOT NULL,
+            iv_band INTEGER NOT NULL,
+            sales INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            min_price INTEGER NOT NULL,
+            max_price INTEGER NOT NULL,
+            last_price INTEGER NOT NULL,
+            last_sold_at INTEGER NOT NULL,
+            buckets TEXT NOT NULL,
+            PRIMARY KEY (species, variant, iv_band)
+        )
+        """,
+    ]),
+    (10, "full-text search over pokemon_embeds", [
+        # rowid is the auction id
+        "CREATE VIRTUAL TABLE IF NOT EXISTS pokemon_search "
+        "USING fts5(title, body)",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS pokemon_search_insert
+        AFTER INSERT ON pokemon_embeds BEGIN
+            INSERT INTO pokemon_search (rowid, title, body)
+            VALUES (new.auction_id, new.title, {_search_body("new.")});
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS pokemon_search_delete
+        AFTER DELETE ON pokemon_embeds BEGIN
+            DELETE FROM pokemon_search WHERE rowid = old.auction_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS pokemon_search_update
+        AFTER UPDATE ON pokemon_embeds BEGIN
+            DELETE FROM pokemon_search WHERE rowid = old.auction_id;
+            INSERT INTO pokemon_search (rowid, title, body)
+            VALUES (new.auction_id, new.title, {_search_body("new.")});
+        END
+        """,
+        "INSERT INTO pokemon_search (rowid, title, body) "
+        f"SELECT auction_id, title, {_search_body()} "
+        "FROM pokemon_embeds",
+    ]),
+    (11, "typed pokemon attributes", [
+        _typed_attributes,
+        "CREATE INDEX IF NOT EXISTS idx_pokemon_attributes_variant_iv "
+        "ON pokemon_attributes(variant, iv_percent)",
+        "CREATE INDEX IF NOT EXISTS idx_pokemon_attributes_species "
+        "ON pokemon_attributes(species)",
+        # /list sort=price walks open auctions by current bid
+        "CREATE INDEX IF NOT EXISTS idx_auctions_open_price "
+        "ON auctions(ifnull(current_bid, 0), auction_id) "
+        "WHERE closed_at IS NULL",
+    ]),
+    (12, "archive and expiry lookups", [
+        # Oldest closed auctions first, for archive.py
+        "CREATE INDEX IF NOT EXISTS idx_auctions_closed "
+        "ON auctions(closed_at) WHERE closed_at IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_auctioned_pokemon_end "
+        "ON auctioned_pokemon(last_auction_end)",
+    ]),
+    (13, "leading bid on auctions", [
+        "ALTER TABLE auctions ADD COLUMN leader_id TEXT",
+        "ALTER TABLE auctions ADD COLUMN bid_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE auctions ADD COLUMN last_bid_at INTEGER",
+        # Only a strictly higher bid takes the lead, so of equal top bids
+        # the first one leads
+        """
+        UPDATE auctions SET
+            leader_id = top.user_id,
+            current_bid = top.bid_amount,
+            bid_count = top.bids,
+            last_bid_at = top.last_bid_at
+        FROM (
+            SELECT auction_id, user_id, bid_amount, bids, last_bid_at
+            FROM (
+                SELECT auction_id, user_id, bid_amount,
+                       COUNT(*) OVER bids_of AS bids,
+                       MAX(timestamp) OVER bids_of AS last_bid_at,
+                       ROW_NUMBER() OVER (PARTITION BY auction_id
+                                          ORDER BY bid_amount DESC, bid_id)
+                           AS place
+                FROM bids
+                WINDOW bids_of AS (PARTITION BY auction_id)
+            )
+            WHERE place = 1
+        ) top
+        WHERE top.auction_id = auctions.auction_id
+        """,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Upgrade the database in place to SCHEMA_VERSION.
+
+    Returns the list of migration versions that were applied.
+    """
+    applied = []
+    current = schema_version(conn)
+    if (current < SCHEMA_VERSION
+            and sqlite3.sqlite_version_info < MIN_SQLITE_VERSION):
+        raise RuntimeError(
+            f"SQLite {sqlite3.sqlite_version} is too old to upgrade the "
+            f"database to schema {SCHEMA_VERSION}; it needs "
+            f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or newer")
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+
+        print(f"Applying migration {version}: {description}")
+        conn.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
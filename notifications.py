@@ -0,0 +1,125 @@
+import asyncio
+
+import discord
+
+from metrics import METRICS
+
+
+class OutbidNotifier:
+    """Sends outbid DMs from background workers.
+
+    Bidders never wait on somebody else's DM: ``notify`` only records the
+    event. Events for the same user within ``window`` seconds are collapsed
+    into one message, and a bounded queue feeds a fixed number of workers.
+    The ``outbid_notifs`` opt-in list is kept in memory and refreshed every
+    ``refresh_interval`` seconds, so other extensions can still edit the
+    table, but an opt-in or opt-out written there can take that long (five
+    minutes by default) to take effect. Outcomes are counted in ``METRICS``
+    as ``outbid_notices_total``.
+    """
+
+    def __init__(self,
+                 bot,
+                 repo,
+                 workers=2,
+                 window=3.0,
+                 queue_size=500,
+                 refresh_interval=300):
+        self.bot = bot
+        self.repo = repo
+        self.workers = workers
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._opted_in = set()
+        self._pending = {}
+        self._tasks = []
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    async def load(self):
+        rows = await self.repo.list_outbid_opt_ins()
+        self._opted_in = {int(row[0]) for row in rows}
+
+    def start(self):
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._refresh()))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def notify(self, user_id, auction_id, channel_id, outbid_by):
+        """Queue an outbid notice; returns immediately."""
+        user_id = int(user_id)
+        if user_id not in self._opted_in:
+            return
+        METRICS.increment("outbid_notices_total", "recorded")
+
+        batch = self._pending.get(user_id)
+        if batch is not None:
+            batch[auction_id] = (channel_id, outbid_by)
+            return
+
+        self._pending[user_id] = {auction_id: (channel_id, outbid_by)}
+        asyncio.get_running_loop().call_later(self.window, self._enqueue,
+                                              user_id)
+
+    def _enqueue(self, user_id):
+        batch = self._pending.pop(user_id, None)
+        if not batch:
+            return
+        try:
+            self._queue.put_nowait((user_id, batch))
+        except asyncio.QueueFull:
+            METRICS.increment("outbid_notices_total", "dropped")
+            print(f"Outbid queue full, dropped notice for user {user_id}")
+
+    async def _worker(self):
+        while True:
+            user_id, batch = await self._queue.get()
+            try:
+                await self._deliver(user_id, batch)
+            except Exception as e:
+                print(f"Unexpected DM error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _refresh(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load()
+            except Exception as e:
+                print(f"Failed to refresh outbid opt-ins: {e}")
+
+    async def _deliver(self, user_id, batch):
+        auction_ids = sorted(batch)
+        if len(auction_ids) == 1:
+            text = f"📣 You've been outbid in auction #{auction_ids[0]}!"
+        else:
+            listed = ", ".join(f"#{auction_id}" for auction_id in auction_ids)
+            text = f"📣 You've been outbid in {len(auction_ids)} auctions: {listed}!"
+
+        try:
+            # Gateway cache first, REST only for users we haven't seen
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(
+                user_id)
+            await user.send(text)
+            METRICS.increment("outbid_notices_total", "sent")
+        except discord.Forbidden:
+            print(f"DM to user {user_id} failed — DMs closed or blocked.")
+            for channel_id, outbid_by in batch.values():
+                channel = self.bot.get_channel(channel_id)
+                if channel is None:
+                    continue
+                await channel.send(
+                    f"📣 <@{user_id}>, You've been outbid by `{outbid_by}`")
+                METRICS.increment("outbid_notices_total", "fallback")
@@ -0,0 +1,27 @@
+class PermissionCache:
+    """In-memory copy of the auctioneer list and the guild allowlist.
+
+    Both are loaded from the DB once and only change through
+    ``invalidate()``, which commands call right after writing to the
+    ``auctioneers`` or ``allowed_guilds`` tables. Every check is a set lookup.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.auctioneers = frozenset()
+        self.guilds = frozenset()
+
+    async def load(self):
+        self.auctioneers = frozenset(
+            int(row[0]) for row in await self.repo.list_auctioneers())
+        self.guilds = frozenset(
+            int(row[0]) for row in await self.repo.list_allowed_guilds())
+
+    async def invalidate(self):
+        await self.load()
+
+    def is_auctioneer(self, user_id):
+        return int(user_id) in self.auctioneers
+
+    def is_guild_allowed(self, guild_id):
+        return int(guild_id) in self.guilds
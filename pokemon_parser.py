@@ -0,0 +1,149 @@
+"""Parsing of Mewbot Pokémon info embeds.
+
+``parse_pokemon_embed`` is pure: it only reads ``title``, ``description``,
+``fields``, ``footer`` and ``image`` from the embed, so it works on
+``discord.Embed`` objects as well as the plain stand-ins used by the
+benchmarks. All patterns are compiled once at import.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+KNOWN_NATURES = (
+    "adamant", "bashful", "bold", "brave", "calm", "careful", "docile",
+    "gentle", "hardy", "hasty", "impish", "jolly", "lax", "lonely", "mild",
+    "modest", "naive", "naughty", "quiet", "quirky", "rash", "relaxed",
+    "sassy", "serious", "timid"
+)
+
+STAT_NAMES = ("HP", "Attack", "Defense", "Sp. Atk", "Sp. Def", "Speed")
+
+# Title markers, checked in priority order
+VARIANT_MARKERS = (
+    ("shiny", ":star2:"),
+    ("radiant", ":radiant:"),
+    ("gleam", ":gleam:"),
+    ("alpha", ":alphapoke2:"),
+    ("shadow", ":shadow:"),
+)
+
+GENDER_MARKERS = (
+    ("Genderless", ":genderless:"),
+    ("Male", ":male:"),
+    ("Female", ":female:"),
+)
+
+GLOBAL_ID_RE = re.compile(r"Global ID#:\s*(\d+)")
+LEVEL_RE = re.compile(r"<:lvl:\d+>\s*(\d+)")
+CUSTOM_EMOJI_RE = re.compile(r"<:\w+:\d+>")
+SHORTCODE_EMOJI_RE = re.compile(r":\w+:")
+NUMBER_RE = re.compile(r"\b\d+\b")
+# Whole whitespace-separated words only, like the old split-and-filter
+NATURE_RE = re.compile(r"(?<!\S)(?:%s)(?!\S)" % "|".join(KNOWN_NATURES))
+NATURE_FIELD_RE = re.compile(r"\*\*Nature\*\*:\s*(\w+)", re.IGNORECASE)
+NICKNAME_RE = re.compile(r"'([^']+)'")
+IV_RE = re.compile(r"IV %.*?(\d+\.\d+)%")
+HELD_ITEM_RE = re.compile(
+    r"(?:Holding|Held Item)\s*:\s*(?:<:\w+:\d+>\s*)?(.*?)(?:\n|$)",
+    re.IGNORECASE)
+HIDDEN_POWER_RE = re.compile(
+    r"\*\*Hidden Power\*\*:\s*(?:`)?(.*?)(?:`)?(?:\n|$)", re.IGNORECASE)
+STATS_RE = re.compile(r"(%s):\s*(\d+).*?(\d+)\s*\|\s*(\d+)" %
+                      "|".join(re.escape(stat) for stat in STAT_NAMES))
+
+
+@dataclass
+class ParsedPokemon:
+    name: str
+    nickname: Optional[str] = None
+    gender: str = "Unknown"
+    level: Optional[int] = None
+    nature: Optional[str] = None
+    variant: str = ""
+    iv_percent: float = 0.0
+    hidden_power: str = "Unknown"
+    held_item: str = "None"
+    # Stat name -> (base, iv, ev), in STAT_NAMES order
+    stats: Dict[str, Tuple[int, int, int]] = field(default_factory=dict)
+    global_id: Optional[str] = None
+    image_url: Optional[str] = None
+
+
+def clean_title(title):
+    """Lowercased title without emojis, numbers or natures."""
+    title = CUSTOM_EMOJI_RE.sub("", title)
+    title = SHORTCODE_EMOJI_RE.sub("", title)
+    title = NUMBER_RE.sub("", title)
+    title = NATURE_RE.sub("", title.lower())
+    return " ".join(title.split())
+
+
+def parse_stats(text):
+    """Extract every stat line in a single scan; the first match wins."""
+    stats = {}
+    for match in STATS_RE.finditer(text):
+        stat = match.group(1)
+        if stat not in stats:
+            stats[stat] = (int(match.group(2)), int(match.group(3)),
+                           int(match.group(4)))
+    return {stat: stats[stat] for stat in STAT_NAMES if stat in stats}
+
+
+def parse_pokemon_embed(embed):
+    """Parse a Mewbot ``/info`` embed into a ParsedPokemon."""
+    raw_title = embed.title or ""
+
+    footer = getattr(embed.footer, "text", None) or ""
+    global_id_match = GLOBAL_ID_RE.search(footer)
+
+    level_match = LEVEL_RE.search(raw_title)
+
+    variant = next(
+        (name for name, marker in VARIANT_MARKERS if marker in raw_title), "")
+    gender = next(
+        (name for name, marker in GENDER_MARKERS if marker in raw_title),
+        "Unknown")
+
+    title = clean_title(raw_title)
+    nickname_match = NICKNAME_RE.search(title)
+    if nickname_match:
+        nickname = nickname_match.group(1).strip()
+        name = " ".join(title.replace(f"'{nickname_match.group(1)}'",
+                                      "").split())
+    else:
+        nickname = None
+        name = title
+
+    description = embed.description or ""
+    field_values = "\n".join(f.value for f in embed.fields)
+    text_block = f"{description}\n{field_values}"
+
+    # The description's Nature line, else the nature word in the title
+    nature_match = NATURE_FIELD_RE.search(text_block)
+    if nature_match:
+        nature = nature_match.group(1).lower()
+    else:
+        nature_match = NATURE_RE.search(raw_title.lower())
+        nature = nature_match.group(0) if nature_match else None
+
+    iv_match = IV_RE.search(text_block)
+    held_match = HELD_ITEM_RE.search(text_block)
+    hidden_power_match = HIDDEN_POWER_RE.search(text_block)
+
+    image = getattr(embed, "image", None)
+
+    return ParsedPokemon(
+        name=name,
+        nickname=nickname,
+        gender=gender,
+        level=int(level_match.group(1)) if level_match else None,
+        nature=nature.capitalize() if nature in KNOWN_NATURES else None,
+        variant=variant,
+        iv_percent=float(iv_match.group(1)) if iv_match else 0.0,
+        hidden_power=hidden_power_match.group(1)
+        if hidden_power_match else "Unknown",
+        held_item=(held_match.group(1).strip() or "None")
+        if held_match else "None",
+        stats=parse_stats(text_block),
+        global_id=global_id_match.group(1) if global_id_match else None,
+        image_url=getattr(image, "url", None))
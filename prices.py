@@ -0,0 +1,91 @@
+"""Price-history rollups for closed auctions.
+
+``price_history`` keeps one row per (species, variant, IV band): the number
+of sales, their total, min, max, the last sale and a histogram of prices in
+logarithmic buckets. A sale updates its row inside the transaction that
+closes the auction, and a lookup merges at most a few dozen rows, so
+``/pricehistory`` costs the same however many auctions have ever run.
+"""
+import json
+import math
+
+# IV % is rolled up in bands of this width; 100% gets its own band
+IV_BAND = 5
+
+# Each histogram bucket is 5% wider than the last, so percentiles read from
+# it are within about 2.5% of the exact value
+BUCKET_GROWTH = 1.05
+
+
+def species_key(name):
+    return " ".join(name.lower().split())
+
+
+def variant_key(variant):
+    return variant or "normal"
+
+
+def iv_band(iv_percent):
+    return int(min(max(iv_percent, 0), 100) // IV_BAND * IV_BAND)
+
+
+def bucket(price):
+    return int(math.log(max(price, 1)) / math.log(BUCKET_GROWTH))
+
+
+def bucket_price(index):
+    """The geometric middle of a bucket, the price it stands for."""
+    return BUCKET_GROWTH**(index + 0.5)
+
+
+def add_sale(buckets_json, price):
+    """Return the histogram JSON with one more sale at ``price``."""
+    buckets = json.loads(buckets_json) if buckets_json else {}
+    key = str(bucket(price))
+    buckets[key] = buckets.get(key, 0) + 1
+    return json.dumps(buckets, separators=(",", ":"))
+
+
+class PriceSummary:
+    """Sales of one Pokémon merged across variants and IV bands."""
+
+    def __init__(self, rows):
+        self.sales = 0
+        self.total = 0
+        self.min_price = None
+        self.max_price = None
+        self.last_price = None
+        self.last_sold_at = None
+        self.buckets = {}
+        for row in rows:
+            self._merge(row)
+
+    def _merge(self, row):
+        self.sales += row["sales"]
+        self.total += row["total"]
+        if self.min_price is None or row["min_price"] < self.min_price:
+            self.min_price = row["min_price"]
+        if self.max_price is None or row["max_price"] > self.max_price:
+            self.max_price = row["max_price"]
+        if self.last_sold_at is None or row["last_sold_at"] > self.last_sold_at:
+            self.last_sold_at = row["last_sold_at"]
+            self.last_price = row["last_price"]
+        for key, count in json.loads(row["buckets"]).items():
+            self.buckets[int(key)] = self.buckets.get(int(key), 0) + count
+
+    @property
+    def average(self):
+        return self.total / self.sales if self.sales else None
+
+    def quantile(self, q):
+        """Estimated price below which a fraction ``q`` of sales fall."""
+        if not self.sales:
+            return None
+        rank = q * self.sales
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                price = bucket_price(index)
+                return round(min(max(price, self.min_price), self.max_price))
+        return self.max_price
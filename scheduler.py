@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import time
+
+
+class AuctionScheduler:
+    """Min-heap of ``(end_time, auction_id)`` deadlines.
+
+    A single background task sleeps until the earliest deadline and then calls
+    ``on_expire`` with the ids that are due. Rescheduling or cancelling an
+    auction is O(log n): stale heap entries are skipped when they surface
+    instead of being removed in place.
+    """
+
+    # Retry delay for deadlines whose callback raised
+    RETRY_DELAY = 30
+
+    def __init__(self, on_expire):
+        self.on_expire = on_expire
+        self._heap = []
+        self._deadlines = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def schedule(self, auction_id, end_time):
+        """Add or move an auction's deadline (a Unix timestamp)."""
+        self._deadlines[auction_id] = end_time
+        heapq.heappush(self._heap, (end_time, auction_id))
+        if self._heap[0] == (end_time, auction_id):
+            self._wakeup.set()
+        self._compact()
+
+    def cancel(self, auction_id):
+        """Forget an auction's deadline, e.g. when it closed early."""
+        self._deadlines.pop(auction_id, None)
+
+    def next_deadline(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def _compact(self):
+        # Edits leave stale entries behind; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(end, auction_id)
+                          for auction_id, end in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now):
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            end_time, auction_id = heapq.heappop(heap)
+            if self._deadlines.get(auction_id) == end_time:
+                del self._deadlines[auction_id]
+                due.append(auction_id)
+        return due
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(
+                0, deadline - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+                continue  # the earliest deadline changed
+            except asyncio.TimeoutError:
+                pass
+
+            due = self._pop_due(time.time())
+            if not due:
+                continue
+            try:
+                await self.on_expire(due)
+            except Exception as e:
+                print(f"Auction expiry failed for {due}: {e}")
+                retry_at = time.time() + self.RETRY_DELAY
+                for auction_id in due:
+                    if auction_id not in self._deadlines:
+                        self.schedule(auction_id, retry_at)
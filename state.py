@@ -0,0 +1,101 @@
+import asyncio
+
+
+class BidRejected(Exception):
+    """A bid failed validation; the message is shown to the bidder."""
+
+
+class AuctionState:
+    """In-memory state of one open auction, everything a bid needs."""
+
+    __slots__ = ("auction_id", "channel_id", "message_id", "auctioneer_id",
+                 "min_bid", "interval", "buyout_price", "end_time",
+                 "current_bid", "leader_id")
+
+    def __init__(self,
+                 auction_id,
+                 channel_id,
+                 message_id,
+                 auctioneer_id,
+                 min_bid,
+                 interval,
+                 buyout_price,
+                 end_time,
+                 current_bid=0,
+                 leader_id=None):
+        self.auction_id = auction_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.auctioneer_id = auctioneer_id
+        self.min_bid = min_bid
+        self.interval = interval
+        self.buyout_price = buyout_price
+        self.end_time = end_time  # Unix timestamp
+        self.current_bid = current_bid
+        self.leader_id = leader_id
+
+    @classmethod
+    def from_row(cls, row):
+        """Build from a replayed journal state (``journal.STATE_FIELDS``)."""
+        return cls(
+            auction_id=row["auction_id"],
+            channel_id=int(row["channel_id"]),
+            message_id=int(row["message_id"]) if row["message_id"] else None,
+            auctioneer_id=int(row["auctioneer_id"]),
+            min_bid=row["min_bid"],
+            interval=row["interval"],
+            buyout_price=int(row["buyout_price"])
+            if row["buyout_price"] else None,
+            end_time=row["end_time"],
+            current_bid=row["current_bid"] or 0,
+            leader_id=int(row["leader_id"]) if row["leader_id"] else None)
+
+
+class AuctionCache:
+    """Write-through cache of open auctions keyed by auction id.
+
+    The database stays the source of truth: callers write to it first and
+    then mirror the change here, so a crash never leaves the cache ahead of
+    the DB. Each open auction also has a lock so bids and closes on the same
+    auction are applied one at a time, while different auctions never wait
+    on each other.
+    """
+
+    def __init__(self):
+        self._auctions = {}
+        self._locks = {}
+
+    def __len__(self):
+        return len(self._auctions)
+
+    def __contains__(self, auction_id):
+        return auction_id in self._auctions
+
+    def __iter__(self):
+        return iter(list(self._auctions.values()))
+
+    def get(self, auction_id):
+        return self._auctions.get(auction_id)
+
+    def put(self, state):
+        self._auctions[state.auction_id] = state
+
+    def remove(self, auction_id):
+        # Waiters still holding the old lock find the auction gone
+        self._locks.pop(auction_id, None)
+        return self._auctions.pop(auction_id, None)
+
+    def lock(self, auction_id):
+        lock = self._locks.get(auction_id)
+        if lock is None:
+            lock = self._locks[auction_id] = asyncio.Lock()
+        return lock
+
+    async def load(self, repo):
+        """Replace the cache contents with every open auction in the DB."""
+        rows = await repo.load_open_auctions()
+        self._auctions = {}
+        self._locks = {}
+        for row in rows:
+            self.put(AuctionState.from_row(row))
+        return len(self._auctions)